@@ -0,0 +1,202 @@
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import cv2
+
+ARCHIVE_DIR = "archive"
+JPEG_QUALITY = 70
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checks (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        reference TEXT,
+        ref_id INTEGER,
+        found TEXT,
+        expected TEXT,
+        similarity REAL,
+        verdict TEXT,
+        latency_ms REAL,
+        timings TEXT,
+        crop BLOB
+    );
+    CREATE INDEX IF NOT EXISTS checks_ts ON checks (ts);
+    CREATE INDEX IF NOT EXISTS checks_reference_ts ON checks (reference, ts);
+"""
+
+_COLUMNS = "id, ts, reference, ref_id, found, expected, similarity, verdict, latency_ms, timings"
+
+
+class InspectionArchive:
+    """
+    Append-only record of every check.
+
+    record() encodes the optional ROI crop as JPEG on the calling thread
+    (an OCR worker) and puts the row on a bounded queue, so queued records
+    stay small; a writer thread inserts them in batches. Each
+    calendar month is its own SQLite file (archive/checks-YYYY-MM.db),
+    indexed by time and by reference, so old months can be moved away and
+    queries only touch the files they need. If the queue is full (disk
+    stalled) records are dropped and counted rather than blocking the GUI.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR, store_crops=False, batch_size=200,
+                 flush_interval=1.0, max_queue=2000):
+        self.directory = directory
+        self.store_crops = store_crops
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._conns = {}       # writer thread only: file path -> connection
+        self.written = 0
+        self.dropped = 0
+
+        self._thread = threading.Thread(target=self._writer, name="archive-writer", daemon=True)
+        self._thread.start()
+
+    # ─── writing ───
+    def record(self, result, reference=None, crop=None):
+        """Queue a run_check() result (plus reference dict / BGR crop) for writing"""
+        blob = None
+        if self.store_crops and crop is not None and crop.size:
+            ok, buf = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            blob = buf.tobytes() if ok else None
+        item = (time.time(), result, reference, blob)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def path_for(self, ts):
+        return os.path.join(self.directory, time.strftime("checks-%Y-%m.db", time.localtime(ts)))
+
+    def _connection(self, path):
+        conn = self._conns.get(path)
+        if conn is None:
+            # A new month started: close the previous files
+            for old in self._conns.values():
+                old.close()
+            self._conns.clear()
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conns[path] = conn
+        return conn
+
+    def _row(self, item):
+        ts, result, reference, blob = item
+        reference = reference or {}
+        return (
+            ts,
+            reference.get('name', result.get('name')),
+            reference.get('id'),
+            result.get('found'),
+            result.get('expected_text'),
+            result.get('similarity'),
+            result.get('verdict'),
+            result.get('elapsed', 0.0) * 1000,
+            json.dumps(result.get('timings', {})),
+            blob,
+        )
+
+    def _write(self, items):
+        by_file = {}
+        for item in items:
+            by_file.setdefault(self.path_for(item[0]), []).append(self._row(item))
+        for path, rows in by_file.items():
+            conn = self._connection(path)
+            with conn:
+                conn.executemany(
+                    "INSERT INTO checks (ts, reference, ref_id, found, expected, similarity,"
+                    " verdict, latency_ms, timings, crop) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows)
+            self.written += len(rows)
+
+    def _writer(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(items)
+            except sqlite3.Error as e:
+                print(f"Warning: could not write {len(items)} archive records: {e}")
+        for conn in self._conns.values():
+            conn.close()
+
+    def close(self):
+        """Flush queued records and stop the writer"""
+        self._stop.set()
+        self._thread.join(timeout=5.0)
+
+    # ─── reading ───
+    def files(self):
+        """Archive files, newest month first"""
+        return sorted(glob.glob(os.path.join(self.directory, "checks-*.db")), reverse=True)
+
+    def page(self, reference=None, before=None, limit=50):
+        """
+        Up to `limit` checks older than `before` (a (ts, id) cursor taken
+        from the last row of the previous page), newest first.
+        Each row is a dict; pass row['file'] and row['id'] to get_crop().
+        """
+        rows = []
+        for path in self.files():
+            if before is not None and self.path_for(before[0]) < path:
+                continue    # whole file is newer than the cursor
+            sql = f"SELECT {_COLUMNS}, crop IS NOT NULL AS has_crop FROM checks"
+            where, params = [], []
+            if reference:
+                where.append("reference = ?")
+                params.append(reference)
+            if before is not None:
+                where.append("(ts < ? OR (ts = ? AND id < ?))")
+                params += [before[0], before[0], before[1]]
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+            params.append(limit - len(rows))
+
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                for row in conn.execute(sql, params):
+                    row = dict(row)
+                    row['file'] = path
+                    row['timings'] = json.loads(row['timings'] or "{}")
+                    rows.append(row)
+            except sqlite3.Error as e:
+                print(f"Warning: could not read {path}: {e}")
+            finally:
+                conn.close()
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def get_crop(self, path, check_id):
+        """JPEG bytes of a stored ROI crop, or None"""
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT crop FROM checks WHERE id = ?", (check_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
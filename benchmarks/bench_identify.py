@@ -0,0 +1,107 @@
+"""
+Identify-mode lookup latency and accuracy over a large catalogue.
+
+    python benchmarks/bench_identify.py                     # 50k synthetic references
+    python benchmarks/bench_identify.py --count 200000 --errors 2
+    python benchmarks/bench_identify.py --patterns 0.5       # half "LOT AB12####" wildcards
+
+Each query is a catalogue text with --errors OCR-style mistakes (a
+confusable swap or a random substitution), so top-1 accuracy shows how
+often the right reference comes back first. With --patterns, that share
+of the references end in "####" and are queried with random digits there.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import identify_module as ident  # noqa: E402
+from matcher_module import CONFUSION_GROUPS  # noqa: E402
+
+ALPHABET = string.ascii_uppercase + string.digits
+CONFUSABLE = {c: group for group in CONFUSION_GROUPS for c in group}
+
+
+def make_catalogue(count, length, rng):
+    texts = set()
+    while len(texts) < count:
+        texts.add(rng.choice(["LOT ", "REF ", "SN "]) + "".join(rng.choices(ALPHABET, k=length)))
+    return [{"name": f"REF{i:06d}", "expected_text": text} for i, text in enumerate(sorted(texts))]
+
+
+def make_patterns(references, share, rng):
+    """
+    Turn `share` of the references into "<prefix>####" wildcards. Returns
+    {id(reference): a concrete text it matches} for building queries.
+    """
+    instances = {}
+    for ref in rng.sample(references, int(len(references) * share)):
+        prefix = ref["expected_text"][:-4]
+        ref["expected_text"] = prefix + "####"
+        instances[id(ref)] = prefix + "".join(rng.choices(string.digits, k=4))
+    return instances
+
+
+def corrupt(text, errors, rng):
+    chars = list(text)
+    for _ in range(errors):
+        i = rng.randrange(len(chars))
+        group = CONFUSABLE.get(chars[i])
+        chars[i] = rng.choice(group) if group else rng.choice(ALPHABET)
+    return "".join(chars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=50000, help="references in the catalogue")
+    parser.add_argument("--length", type=int, default=8, help="random characters per text")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--errors", type=int, default=1, help="OCR mistakes per query")
+    parser.add_argument("--patterns", type=float, default=0.0,
+                        help="share of wildcard references (0-1)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    references = make_catalogue(args.count, args.length, rng)
+    instances = make_patterns(references, args.patterns, rng)
+
+    start = time.perf_counter()
+    identifier = ident.ReferenceIdentifier(references)
+    build_time = time.perf_counter() - start
+
+    targets = rng.sample(references, min(args.queries, len(references)))
+    queries = [corrupt(instances.get(id(ref), ref["expected_text"]), args.errors, rng) for ref in targets]
+    identifier.identify(queries[0], args.k)     # warm-up
+
+    timings, top1, topk = [], 0, 0
+    for ref, query in zip(targets, queries):
+        t0 = time.perf_counter()
+        matches = identifier.identify(query, args.k)
+        timings.append(time.perf_counter() - t0)
+        found = [m[0] is ref for m in matches]
+        top1 += bool(found) and found[0]
+        topk += any(found)
+
+    timings.sort()
+    print(json.dumps({
+        "references": len(references),
+        "queries": len(queries),
+        "patterns": len(instances),
+        "errors": args.errors,
+        "build_ms": round(build_time * 1000, 1),
+        "p50_us": round(timings[len(timings) // 2] * 1e6, 1),
+        "p95_us": round(timings[int(len(timings) * 0.95) - 1] * 1e6, 1),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1] * 1e6, 1),
+        "top1": round(top1 / len(queries), 4),
+        f"top{args.k}": round(topk / len(queries), 4),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-call OCR latency of each backend on the reference ROIs.
+
+    python benchmarks/bench_ocr_backends.py                 # synthetic ROIs
+    python benchmarks/bench_ocr_backends.py --image frame.png --repeat 50
+
+Without --image, each reference's expected_text is rendered into an image
+of its ROI size, so the numbers are comparable between machines.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr_module as ocr  # noqa: E402
+from reference_module import REFERENCES_DB, load_references, roi_pixels  # noqa: E402
+from source_module import render_text  # noqa: E402
+
+
+def load_samples(references_path, image_path=None):
+    references = load_references(references_path)
+    frame = cv2.imread(image_path) if image_path else None
+    samples = []
+    for ref in references:
+        if not ref.get("roi"):
+            continue
+        if frame is not None:
+            x, y, w, h = roi_pixels(ref, (frame.shape[1], frame.shape[0]))
+            roi = frame[y:y+h, x:x+w]
+            if roi.size == 0:
+                continue
+        else:
+            _, _, w, h = roi_pixels(ref)
+            roi = render_text(ref["expected_text"], w, h)
+        samples.append((ref["name"], ocr.preprocess_roi(roi, ref.get("preprocess"))))
+    return samples
+
+
+def bench_backend(name, samples, repeat):
+    start = time.perf_counter()
+    backend = ocr.create_backend(name)
+    init_time = time.perf_counter() - start
+
+    timings = []
+    for _ in range(repeat):
+        for _, image in samples:
+            t0 = time.perf_counter()
+            backend.image_to_string(image)
+            timings.append(time.perf_counter() - t0)
+    backend.close()
+
+    timings.sort()
+    return {
+        "backend": name,
+        "init_ms": round(init_time * 1000, 2),
+        "calls": len(timings),
+        "mean_ms": round(statistics.mean(timings) * 1000, 2),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--references", default=REFERENCES_DB, help="reference database or .json file")
+    parser.add_argument("--image", help="camera frame to crop the ROIs from")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=["pytesseract", "tesserocr"])
+    args = parser.parse_args()
+
+    samples = load_samples(args.references, args.image)
+    if not samples:
+        sys.exit("No ROIs to benchmark")
+
+    for name in args.backends:
+        try:
+            print(json.dumps(bench_backend(name, samples, args.repeat)))
+        except Exception as e:
+            print(json.dumps({"backend": name, "error": str(e)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+End-to-end benchmark: capture -> preprocess -> OCR -> compare.
+
+    python benchmarks/bench_pipeline.py                            # synthetic frames
+    python benchmarks/bench_pipeline.py --source line3.mp4 --output bench.json
+    python benchmarks/bench_pipeline.py --source frames/ --workers 4 --frames 200
+    python benchmarks/bench_pipeline.py --cameras 3               # three stations, one OCR pool
+    python benchmarks/bench_pipeline.py --per-roi                 # unbatched preprocessing, to compare
+
+Every frame is batch-checked against all references. The report (JSON)
+has throughput, p50/p95/p99 per stage, CPU and RSS, and the share of
+checks that matched their expected_text, tagged with the git commit so
+runs can be compared.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import camera_module as cam  # noqa: E402
+import ocr_module as ocr  # noqa: E402
+import reference_module as refs  # noqa: E402
+import source_module as src  # noqa: E402
+from _common import git_commit  # noqa: E402
+
+STAGES = ("capture", "preprocess", "ocr", "compare", "check", "batch")
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def pick(q):
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 3)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": round(values[-1] * 1000, 3), "count": len(values)}
+
+
+def rss_mb():
+    """Current resident set size, falls back to the peak where /proc is missing"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def cpu_seconds():
+    """CPU time of this process plus finished children (tesseract CLI runs)"""
+    me = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return me.ru_utime + me.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_station(source, camera, executor, max_frames, samples, totals, per_roi=False):
+    """
+    Feed one source through the shared executor, as one camera of a line.
+    per_roi: copy and preprocess every crop on its own in the workers
+    instead of camera.submit_references()' batched preprocessing.
+    """
+    checks = matches = frames = 0
+    try:
+        while not max_frames or frames < max_frames:
+            t0 = time.perf_counter()
+            ret, frame = source.read()
+            t1 = time.perf_counter()
+            if not ret:
+                break
+            samples["capture"].append(t1 - t0)
+
+            if per_roi:
+                futures = executor.submit_batch(camera.crop_references(frame), client=camera.name)
+            else:
+                futures = [future for _, _, future in camera.submit_references(executor, frame)]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except CancelledError:
+                    pass
+            samples["batch"].append(time.perf_counter() - t1)
+            for result in results:
+                samples["check"].append(result['elapsed'])
+                for stage, seconds in result.get('timings', {}).items():
+                    samples[stage].append(seconds)
+                checks += 1
+                matches += result['verdict'] == "MATCH"
+            frames += 1
+    finally:
+        source.release()
+    totals.append((frames, checks, matches))
+
+
+def run_benchmark(sources, references, workers, max_frames, per_roi=False):
+    """One thread (camera) per source, all sharing one OcrExecutor"""
+    executor = ocr.OcrExecutor(max_workers=workers, max_pending=max(4, workers or 0))
+    samples = {stage: [] for stage in STAGES}
+    totals = []
+    rss_peak = rss_mb()
+    cpu_start = cpu_seconds()
+    wall_start = time.perf_counter()
+
+    threads = []
+    for i, source in enumerate(sources):
+        camera = cam.CameraApp(name=f"camera{i}", index=i)
+        camera.references = references
+        t = threading.Thread(target=run_station,
+                             args=(source, camera, executor, max_frames, samples, totals, per_roi))
+        t.start()
+        threads.append(t)
+    try:
+        while any(t.is_alive() for t in threads):
+            rss_peak = max(rss_peak, rss_mb())
+            time.sleep(0.1)
+    finally:
+        for t in threads:
+            t.join()
+        executor.shutdown()
+    frames, checks, matches = (sum(col) for col in zip(*totals)) if totals else (0, 0, 0)
+
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+    return {
+        "commit": git_commit(),
+        "workers": executor.max_workers,
+        "cameras": len(sources),
+        "preprocessing": "per-roi" if per_roi else "batched",
+        "backend": ocr.OCR_BACKEND,
+        "frames": frames,
+        "checks": checks,
+        "wall_s": round(wall, 3),
+        "fps": round(frames / wall, 2) if wall else None,
+        "checks_per_s": round(checks / wall, 2) if wall else None,
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else None,
+        "rss_mb": rss_mb(),
+        "rss_peak_mb": rss_peak,
+        "accuracy": round(matches / checks, 4) if checks else None,
+        "cache": ocr.ocr_cache.stats() if ocr.ocr_cache is not None else None,
+        "stages": {stage: percentiles(values) for stage, values in samples.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", default="synthetic",
+                        help="'synthetic', a video file, an image folder or a camera index")
+    parser.add_argument("--references", default=refs.REFERENCES_DB, help="reference database or .json file")
+    parser.add_argument("--frames", type=int, default=50, help="frames to process, 0 = whole source")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cameras", type=int, default=1,
+                        help="stations fed in parallel (each its own copy of the source)")
+    parser.add_argument("--no-cache", action="store_true", help="disable the OCR result cache")
+    parser.add_argument("--per-roi", action="store_true",
+                        help="preprocess each crop separately (the old path) instead of batched")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    references = [r for r in refs.load_references(args.references) if r.get("roi")]
+    if not references:
+        sys.exit(f"No references with a ROI in {args.references}")
+    if args.no_cache:
+        ocr.ocr_cache = None
+
+    sources = []
+    for i in range(args.cameras):
+        if args.source == "synthetic":
+            # Render at the resolution the ROIs were drawn at
+            size = next((tuple(r['resolution']) for r in references if r.get('resolution')), (640, 480))
+            source = src.SyntheticTextSource(references, size=size, frames=args.frames, seed=i)
+        else:
+            source = src.open_source(args.source, fps=0)
+        if not source.isOpened():
+            sys.exit(f"Could not open source {args.source}")
+        sources.append(source)
+
+    report = run_benchmark(sources, references, args.workers, args.frames, args.per_roi)
+    report["source"] = args.source
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
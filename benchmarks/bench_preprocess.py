@@ -0,0 +1,109 @@
+"""
+Per-stage latency and OCR accuracy of each preprocessing pipeline.
+
+    python benchmarks/bench_preprocess.py                       # synthetic fixtures
+    python benchmarks/bench_preprocess.py --fixtures labels/ --pipelines legacy default otsu
+
+A fixture directory holds ROI crops named after their expected text,
+e.g. "123658.png" or "123658__glare.png" (everything after "__" is ignored).
+Without --fixtures, the reference texts are rendered and degraded with
+blur and sensor noise.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr_module as ocr  # noqa: E402
+import preprocess_module as pre  # noqa: E402
+from reference_module import REFERENCES_DB, load_references, roi_pixels  # noqa: E402
+from source_module import render_text  # noqa: E402
+
+
+def load_fixtures(directory):
+    fixtures = []
+    for filename in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() not in (".png", ".jpg", ".jpeg", ".bmp"):
+            continue
+        img = cv2.imread(os.path.join(directory, filename))
+        if img is not None:
+            fixtures.append((stem.split("__")[0], img))
+    return fixtures
+
+
+def synthetic_fixtures(references_path, seed=0):
+    references = load_references(references_path)
+    rng = np.random.default_rng(seed)
+    fixtures = []
+    for ref in references:
+        if not ref.get("roi"):
+            continue
+        _, _, w, h = roi_pixels(ref)
+        img = cv2.GaussianBlur(render_text(ref["expected_text"], w, h), (3, 3), 0)
+        noise = rng.normal(0, 12, img.shape)
+        fixtures.append((ref["expected_text"], np.clip(img + noise, 0, 255).astype(np.uint8)))
+    return fixtures
+
+
+def bench_pipeline(name, fixtures, repeat, backend):
+    stage_times = {}
+    correct = 0
+    ocr_error = None
+    for _ in range(repeat):
+        for _, img in fixtures:
+            timings = []
+            pre.apply_pipeline(img, name, timings)
+            for op, seconds in timings:
+                stage_times.setdefault(op, []).append(seconds)
+
+    for expected, img in fixtures:
+        if backend is None:
+            break
+        try:
+            found = backend.image_to_string(pre.apply_pipeline(img, name)).strip()
+        except Exception as e:
+            ocr_error = str(e)
+            break
+        verdict, _ = ocr.compare_text(found, expected)
+        correct += verdict == "MATCH"
+
+    stages = {op: round(statistics.mean(t) * 1000, 3) for op, t in stage_times.items()}
+    report = {
+        "pipeline": name,
+        "stages_ms": stages,
+        "total_ms": round(sum(stages.values()), 3),
+        "fixtures": len(fixtures),
+        "accuracy": None if backend is None or ocr_error else round(correct / len(fixtures), 3),
+    }
+    if ocr_error:
+        report["ocr_error"] = ocr_error
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--references", default=REFERENCES_DB, help="reference database or .json file")
+    parser.add_argument("--fixtures", help="directory of ROI crops named <expected text>.png")
+    parser.add_argument("--pipelines", nargs="+", default=list(pre.PIPELINES))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--backend", default=ocr.OCR_BACKEND)
+    parser.add_argument("--no-ocr", action="store_true", help="latency only")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.references)
+    if not fixtures:
+        sys.exit("No fixtures to benchmark")
+
+    backend = None if args.no_ocr else ocr.create_backend(args.backend)
+    for name in args.pipelines:
+        print(json.dumps(bench_pipeline(name, fixtures, args.repeat, backend)))
+
+
+if __name__ == "__main__":
+    main()
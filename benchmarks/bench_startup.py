@@ -0,0 +1,95 @@
+"""
+Cold-start benchmark: import times and time until the window is usable.
+
+    python benchmarks/bench_startup.py                    # 5 runs per measurement
+    python benchmarks/bench_startup.py --budget-ms 300    # exit 1 when `import main` is slower
+
+Every run starts a fresh interpreter, so nothing is shared through
+sys.modules (the OS page cache stays warm; drop it to time a real boot).
+'import_ms' is the median import time of each module. With a display,
+'window_ms' is the time from the start of the script to the first drawn
+window and 'ready_ms' until the startup thread is done (modules loaded,
+Tesseract warm, cameras open).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from _common import ROOT, git_commit
+MODULES = ("main", "ttkbootstrap", "numpy", "cv2", "pytesseract", "camera_module", "ocr_module")
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+WINDOW_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+app = main.MainApp()
+app.update()
+window = time.perf_counter() - start
+while not app.startup.done() and time.perf_counter() - start < 60:
+    app.update()
+    time.sleep(0.01)
+ready = time.perf_counter() - start
+app.destroy()
+print(window, ready)
+"""
+
+
+def run(script, **fmt):
+    out = subprocess.run([sys.executable, "-c", script.format(**fmt)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return [float(v) for v in out.splitlines()[-1].split()]     # the app may print before
+
+
+def median_ms(samples):
+    return round(statistics.median(samples) * 1000, 1) if samples else None
+
+
+def has_display():
+    return sys.platform != "linux" or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--no-window", action="store_true", help="only time the imports")
+    parser.add_argument("--budget-ms", type=float, help="fail when `import main` takes longer")
+    args = parser.parse_args()
+
+    report = {"commit": git_commit(), "runs": args.runs, "import_ms": {}}
+    for module in args.modules:
+        samples = []
+        for _ in range(args.runs):
+            try:
+                samples += run(IMPORT_SCRIPT, module=module)
+            except subprocess.CalledProcessError:
+                break           # not installed here
+        report["import_ms"][module] = median_ms(samples)
+
+    if not args.no_window and has_display():
+        windows, readies = [], []
+        for _ in range(args.runs):
+            window, ready = run(WINDOW_SCRIPT)
+            windows.append(window)
+            readies.append(ready)
+        report["window_ms"] = median_ms(windows)
+        report["ready_ms"] = median_ms(readies)
+
+    print(json.dumps(report, indent=2))
+    main_ms = report["import_ms"].get("main")
+    if args.budget_ms is not None and main_ms is not None and main_ms > args.budget_ms:
+        sys.exit(f"import main took {main_ms} ms, budget is {args.budget_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
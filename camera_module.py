@@ -1,37 +1,448 @@
 import cv2
-from PIL import Image, ImageTk
-import pytesseract
 import numpy as np
-from difflib import SequenceMatcher
+import threading
+import time
+from concurrent.futures import Future
+
+import ocr_module as ocr
+import preprocess_module as pre
+import source_module as src
+from inspection_module import ref_key
+from perf_module import perf
+from reference_module import aspect_mismatch, capture_resolution, roi_pixels
 
 DISPLAY_WIDTH = 840
 
+# Batched ROI preprocessing (RoiPreprocessor): columns between stacked ROIs,
+# each ROI gets half of them (at least the reach of the neighbourhood
+# stages, e.g. 15 for adaptive)
+PREPROCESS_GAP = 32
+
+
+class RoiPreprocessor:
+    """
+    Preprocesses the reference ROIs of a frame in one batch, into reused
+    buffers.
+
+    ROIs with the same pipeline are converted to gray, scaled to the
+    height of its leading resize stage and laid side by side in one stacked image, `gap` columns apart
+    (filled like OpenCV extends the image border for the next stage).
+    Neighbourhood stages (median,
+    blur, morphology, adaptive threshold...) then run once over the whole
+    stack; stages that need statistics of the whole ROI
+    (preprocess_module.GLOBAL_STAGES) run on each ROI's view in place.
+    Each result is copied into an output buffer of its reference that is
+    handed out until release(), so OCR workers can read it while the next
+    frame is being prepared. Every array is allocated once per reference
+    and ROI size and then reused, so memory stays flat over long runs.
+    Pipelines that don't start with a resize (or resize again later) are
+    run with preprocess_module.apply_pipeline() instead, so a ROI always
+    gets the same image as a single check would.
+    """
+
+    def __init__(self, gap=PREPROCESS_GAP, spare=2):
+        self.gap = gap
+        self.spare = spare             # free output buffers kept per reference
+        self._gray = {}                # key -> gray buffer of the ROI at frame size
+        self._stacks = {}              # pipeline -> [stack, stack] ping-pong buffers
+        self._free = {}                # key -> output buffers not in use
+        self._lock = threading.Lock()
+        self.allocated = 0             # buffers allocated so far, flat once warmed up
+
+    def reset(self):
+        """Drop all buffers, e.g. after the references changed"""
+        with self._lock:
+            self._gray.clear()
+            self._stacks.clear()
+            self._free.clear()
+
+    def _buffer(self, pool, key, shape):
+        buf = pool.get(key)
+        if buf is None or buf.shape != shape:
+            buf = pool[key] = np.empty(shape, np.uint8)
+            self.allocated += 1
+        return buf
+
+    def _stack(self, pipeline, width, height):
+        bufs = self._stacks.get(pipeline)
+        if bufs is None or bufs[0].shape[0] != height or bufs[0].shape[1] < width:
+            bufs = self._stacks[pipeline] = [np.zeros((height, width), np.uint8) for _ in range(2)]
+            self.allocated += 2
+        return [buf[:, :width] for buf in bufs]
+
+    def _output(self, key, shape):
+        free = self._free.get(key)
+        while free:
+            buf = free.pop()
+            if buf.shape == shape:
+                return buf
+        self.allocated += 1
+        return np.empty(shape, np.uint8)
+
+    def release(self, key, image):
+        """Give back an output buffer once nothing reads it any more"""
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.spare:
+                free.append(image)
+
+    def process(self, frame, items):
+        """
+        items: [(key, (x, y, w, h) frame box, pipeline spec)]. Returns the
+        preprocessed image of each item (None for an empty box), to be
+        handed back with release(key, image).
+        """
+        results = [None] * len(items)
+        groups = {}
+        for i, (key, box, spec) in enumerate(items):
+            stages = pre.resolve_pipeline(spec)
+            pipeline = tuple(tuple(sorted(stage.items())) for stage in stages)
+            groups.setdefault(pipeline, []).append(i)
+
+        with self._lock:
+            for pipeline, indices in groups.items():
+                stages = [dict(stage) for stage in pipeline]
+                if not stages or stages[0]["op"] != "resize" or \
+                        any(stage["op"] == "resize" for stage in stages[1:]):
+                    for i in indices:
+                        key, (x, y, w, h), spec = items[i]
+                        crop = frame[y:y+h, x:x+w]
+                        results[i] = pre.apply_pipeline(crop, spec) if crop.size else None
+                    continue
+                height = stages.pop(0).get("height", pre.RESIZE_HEIGHT)
+                self._process_group(frame, items, indices, stages, pipeline, height, results)
+        return results
+
+    def _process_group(self, frame, items, indices, stages, pipeline, height, results):
+        gap = self.gap
+        spans = []                     # (index, x0, width) in the stack
+        grays = []
+        x0 = gap
+        for i in indices:
+            key, (x, y, w, h), _ = items[i]
+            crop = frame[y:y+h, x:x+w]
+            if crop.size == 0:
+                continue
+            h, w = crop.shape[:2]      # clipped at the frame edge
+            if crop.ndim == 3:
+                crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY, dst=self._buffer(self._gray, key, (h, w)))
+            width = max(1, round(w * height / h))
+            spans.append((i, x0, width))
+            grays.append(crop)
+            x0 += width + gap
+        if not spans:
+            return
+
+        src, dst = self._stack(pipeline, x0, height)
+        for (i, x0, width), gray in zip(spans, grays):
+            view = src[:, x0:x0 + width]
+            if gray.shape[0] == height and gray.shape[1] == width:
+                np.copyto(view, gray)
+            else:
+                interpolation = cv2.INTER_AREA if gray.shape[0] > height else cv2.INTER_CUBIC
+                cv2.resize(gray, (width, height), dst=view, interpolation=interpolation)
+        outputs = [self._output(items[i][0], (height, width)) for i, _, width in spans]
+
+        last = len(stages) - 1
+        for n, stage in enumerate(stages):
+            op = stage["op"]
+            params = {k: v for k, v in stage.items() if k != "op"}
+            if op in pre.GLOBAL_STAGES:
+                # The last stage writes straight into the output buffers
+                for (_, x0, width), out in zip(spans, outputs):
+                    view = src[:, x0:x0 + width]
+                    pre.STAGES[op](view, dst=out if n == last else view, **params)
+            else:
+                # The gaps stand in for the image border of each ROI
+                self._fill_gaps(src, spans, replicate=op in pre.REPLICATE_BORDER_STAGES)
+                pre.STAGES[op](src, dst=dst, **params)
+                src, dst = dst, src
+
+        for (i, x0, width), out in zip(spans, outputs):
+            if not stages or stages[-1]["op"] not in pre.GLOBAL_STAGES:
+                np.copyto(out, src[:, x0:x0 + width])
+            results[i] = out
+
+    def _fill_gaps(self, stack, spans, replicate=False):
+        """
+        Fill every gap column of the stack from the ROIs around it: each ROI
+        reflects its edge columns into its half of the neighbouring gaps
+        (and repeats its edge when narrower than that, or everywhere with
+        `replicate`), the first and last ROI out to the ends, so nothing of
+        an earlier batch is left.
+        """
+        for n, (_, x0, width) in enumerate(spans):
+            x1 = x0 + width
+            left = x0 - (x0 - sum(spans[n - 1][1:])) // 2 if n else 0
+            right = x1 + (spans[n + 1][1] - x1 + 1) // 2 if n + 1 < len(spans) else stack.shape[1]
+            k = 0 if replicate else min(x0 - left, width - 1)
+            if k > 0:
+                stack[:, x0 - k:x0] = stack[:, x0 + k:x0:-1]
+            stack[:, left:x0 - k] = stack[:, x0:x0 + 1]
+            k = 0 if replicate else min(right - x1, width - 1)
+            if k > 0:
+                stack[:, x1:x1 + k] = stack[:, x1 - 2:x1 - 2 - k:-1]
+            stack[:, x1 + k:right] = stack[:, x1 - 1:x1]
+
 
 class CameraApp:
-    def __init__(self):
+    def __init__(self, name="camera", index=0):
+        self.name = name               # also the OCR scheduling client of this camera
+        self.index = index             # references with 'camera': index belong here
         self.cap = None
         self.is_running = False
+        self.display_width = DISPLAY_WIDTH
         self.display_scale = 1.0
-        
+        self.display_size = None       # (width, height) of the preview image
+        self.frame_size = None         # (width, height) of the full sensor image
+        self.frame_offset = (0, 0)     # origin of the captured frames when cropped upstream
+
         # Reference management
-        self.references = []           # list of dicts: {'name': str, 'expected_text': str, 'roi': (x,y,w,h)}
-        self.current_roi = None        # currently active ROI for checking (x,y,w,h)
+        self.references = []           # list of dicts: {'name': str, 'expected_text': str, 'roi': normalized (x,y,w,h), 'resolution': (w,h)}
+        self.current_roi = None        # currently active ROI for checking, frame pixels (x,y,w,h)
         self.expected_text = ""        # text we expect in the current active reference
+        self.preprocess = None         # preprocessing pipeline of the active reference (None = default)
 
         # Temporary ROI for live preview while dragging
         self.temp_roi = None
 
-    def start_camera(self, camera_index=1):
-        self.cap = cv2.VideoCapture(0)
+        self._aspect_checked = set()   # (id(ref), frame_size) already checked for stretching
+
+        # Optional locate_module.RoiTracker: reference crops follow the part
+        self.tracker = None
+        # Text regions proposed by locate_module.detect_text_regions (frame pixels)
+        self.proposals = []
+        # Batched preprocessing of the reference ROIs, see submit_references()
+        self.preprocessor = RoiPreprocessor()
+
+        # Capture thread: owns self.cap and publishes only the newest frame.
+        # The slot holds a (seq, frame) tuple and is replaced with a single
+        # assignment, so readers never block on the camera.
+        self._capture_thread = None
+        self._latest = None
+        self._consumed_seq = 0
+        self._displayed_seq = 0
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+        # Decoding: every grabbed frame is decoded unless decode_fps is set,
+        # then at most decode_fps frames per second plus any fresh_frame()
+        # request (decode_fps=0: only on request). Frames that are not
+        # decoded are still grabbed so the driver queue never goes stale.
+        self.decode_fps = None
+        self.frames_decoded = 0
+        self.fps = 0.0                 # measured rate of decoded frames (smoothed)
+        self._last_frame_time = None
+        self._decode_requested = False
+        self._next_decode = 0.0
+        self._frame_ready = threading.Condition()
+
+        # Called as cb(seq, frame) from the capture thread for every frame
+        self.frame_callbacks = []
+
+        # Display path: reused buffers, cached ROI overlay, one PhotoImage
+        self._half_bufs = []
+        self._display_buf = None
+        self._rgb_buf = None
+        self._overlay = None
+        self._overlay_mask = None
+        self._overlay_key = None
+        self._photo = None
+
+    def start_camera(self, camera_index=0, source=None, resolution=None, fps=None, fourcc=None,
+                     crop=None):
+        """
+        Open camera `camera_index`, or `source` (anything
+        source_module.open_source() accepts, or an already opened source
+        object), and start capturing. resolution / fps / fourcc select the
+        camera mode (default source_module.CAMERA_*, or the resolution the
+        references were drawn at if its aspect ratio differs, see
+        reference_module.capture_resolution), crop=(x, y, w, h) is
+        cut upstream by GStreamer sources. Frames are kept at full
+        resolution for OCR; only the preview is scaled down.
+        """
+        if source is None:
+            source = camera_index
+        if isinstance(source, (int, str)):
+            resolution = resolution or capture_resolution(self.references, src.CAMERA_RESOLUTION)
+            self.cap = src.open_source(source, fps=fps, resolution=resolution, fourcc=fourcc,
+                                       crop=crop)
+        else:
+            self.cap = source
         if not self.cap.isOpened():
-            print(f"Warning: Could not open camera index {camera_index}")
-        self.is_running = self.cap.isOpened()
+            print(f"Warning: Could not open camera source {source}")
+            self.is_running = False
+            return
+
+        self._latest = None
+        self._consumed_seq = 0
+        self._displayed_seq = 0
+        self.frame_size = getattr(self.cap, "full_size", None)
+        self.frame_offset = getattr(self.cap, "frame_offset", (0, 0))
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_decoded = 0
+        self.fps = 0.0
+        self._last_frame_time = None
+        self.is_running = True
+        self._capture_thread = threading.Thread(target=self._capture_loop,
+                                                name=f"capture-{self.name}", daemon=True)
+        self._capture_thread.start()
 
     def stop_camera(self):
+        self.is_running = False
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout=1.0)
+            self._capture_thread = None
         if self.cap is not None:
             self.cap.release()
             self.cap = None
-        self.is_running = False
+        self._latest = None
+
+    def _capture_loop(self):
+        """
+        Grab frames as fast as the camera delivers them; decode (retrieve)
+        only the ones somebody will look at and keep just the newest.
+        """
+        seq = 0
+        # A source that reports its sensor size may crop upstream (possibly
+        # at the origin): its frames don't tell the sensor size
+        sized = getattr(self.cap, "full_size", None) is not None
+        while self.is_running and self.cap is not None:
+            with perf.timer("capture"):
+                ret = self.cap.grab()
+            if not ret:
+                if not src.is_live(self.cap):
+                    # End of a video file / image folder
+                    self.is_running = False
+                    break
+                time.sleep(0.01)
+                continue
+            seq += 1
+            self.frames_captured += 1
+            perf.tick("capture")
+            if not self._should_decode():
+                continue
+
+            with perf.timer("decode"):
+                ret, frame = self.cap.retrieve()
+            if not ret or frame is None:
+                continue
+            if not sized and self.frame_size != (frame.shape[1], frame.shape[0]):
+                self.frame_size = (frame.shape[1], frame.shape[0])
+            previous = self._latest
+            if previous is not None and previous[0] > self._consumed_seq:
+                self.frames_dropped += 1
+            self._latest = (seq, frame)
+            self.frames_decoded += 1
+            now = time.monotonic()
+            if self._last_frame_time is not None and now > self._last_frame_time:
+                rate = 1.0 / (now - self._last_frame_time)
+                self.fps = rate if not self.fps else 0.9 * self.fps + 0.1 * rate
+            self._last_frame_time = now
+            with self._frame_ready:
+                self._frame_ready.notify_all()
+
+            for callback in list(self.frame_callbacks):
+                try:
+                    callback(seq, frame)
+                except Exception as e:
+                    print(f"Warning: frame callback failed: {e}")
+
+    def _should_decode(self):
+        if self._decode_requested:
+            self._decode_requested = False
+            return True
+        if self.decode_fps is None:
+            return True
+        now = time.monotonic()
+        if self.decode_fps and now >= self._next_decode:
+            interval = 1.0 / self.decode_fps
+            self._next_decode = max(self._next_decode + interval, now + interval / 2)
+            return True
+        return False
+
+    def fresh_frame(self, timeout=1.0):
+        """
+        Decode the next grabbed frame and wait for it (for decode_fps=0,
+        where frames are only decoded for OCR). Returns (seq, frame), or
+        (0, None) on timeout.
+        """
+        latest = self._latest
+        after = latest[0] if latest is not None else 0
+        deadline = time.monotonic() + timeout
+        with self._frame_ready:
+            self._decode_requested = True
+            while self.is_running and (self._latest is None or self._latest[0] <= after):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return 0, None
+                self._frame_ready.wait(remaining)
+        return self.latest_frame()
+
+    def latest_frame(self):
+        """
+        Return (seq, frame) for the newest captured frame without blocking,
+        or (0, None) if nothing has been captured yet.
+        The frame is shared: copy it before drawing on it.
+        """
+        latest = self._latest
+        if latest is None:
+            return 0, None
+        seq, frame = latest
+        if seq > self._consumed_seq:
+            self._consumed_seq = seq
+        return seq, frame
+
+    def frame_for_check(self):
+        """Frame to OCR: the newest decoded one, or a freshly decoded one when decode_fps=0"""
+        if self.decode_fps == 0:
+            return self.fresh_frame()
+        return self.latest_frame()
+
+    def ref_roi(self, ref):
+        """Pixel ROI of a reference in the current frames, None until a frame arrived"""
+        if self.frame_size is None and 'resolution' in ref:
+            return None
+        return self._roi_pixels(ref, self.frame_size)
+
+    def _roi_pixels(self, ref, frame_size):
+        """roi_pixels(), warning once per reference and frame size if it gets stretched"""
+        key = (id(ref), frame_size)
+        if key not in self._aspect_checked:
+            self._aspect_checked.add(key)
+            if frame_size is not None and aspect_mismatch(ref, frame_size):
+                (w, h), (fw, fh) = ref['resolution'], frame_size
+                print(f"Warning: {self.name}: the ROI of '{ref['name']}' was drawn on {w}x{h} frames, "
+                      f"frames are now {fw}x{fh}; it is stretched, redraw it or run the camera at {w}x{h}")
+        return roi_pixels(ref, frame_size)
+
+    def frame_roi(self, roi):
+        """Sensor pixel ROI -> pixels of the captured (possibly upstream-cropped) frame"""
+        x, y, w, h = roi
+        ox, oy = self.frame_offset
+        return x - ox, y - oy, w, h
+
+    def frame_box(self, ref, frame):
+        """
+        Where reference `ref` lies in a captured frame, None without a ROI.
+        With a tracker, the stored ROI is moved onto the part.
+        """
+        roi = self._roi_pixels(ref, self.frame_size or (frame.shape[1], frame.shape[0]))
+        if not roi:
+            return None
+        box = self.frame_roi(roi)
+        if self.tracker is not None:
+            with perf.timer("track"):
+                box = self.tracker.locate(ref_key(ref), ref, frame, box)
+        return box
+
+    def display_to_frame(self, x, y, w, h):
+        """Rectangle on the preview image -> sensor pixels"""
+        scale = self.display_scale or 1.0
+        ox, oy = self.frame_offset
+        return (int(round(x / scale)) + ox, int(round(y / scale)) + oy,
+                int(round(w / scale)), int(round(h / scale)))
 
     def set_roi(self, x, y, w, h):
         """Set permanent ROI for checking"""
@@ -44,60 +455,142 @@ class CameraApp:
     def clear_roi(self):
         self.current_roi = None
         self.temp_roi = None
+        self.proposals = []
         self.expected_text = ""
+        self.preprocess = None
 
     def set_expected_text(self, text: str):
         """Set the expected reference text for comparison"""
         self.expected_text = text.strip()
 
     def get_frame(self):
+        """
+        Render the newest frame for display. Returns the persistent
+        PhotoImage (updated in place), or None if there is no new frame.
+        """
         if not self.is_running or self.cap is None:
             return None
 
-        ret, frame = self.cap.read()
-        if not ret:
+        seq, frame = self.latest_frame()
+        if frame is None or seq == self._displayed_seq:
             return None
+        self._displayed_seq = seq
 
-        # Draw saved / loaded reference ROIs (green)
+        # Tk is only needed for the GUI, keep camera_module importable headless
+        from PIL import Image, ImageTk
+
+        with perf.timer("display_render"):
+            rgb = self.render_display(frame)
+            h, w = rgb.shape[:2]
+            if self._photo is None or self._photo.width() != w or self._photo.height() != h:
+                self._photo = ImageTk.PhotoImage("RGB", (w, h))
+            self._photo.paste(Image.fromarray(rgb))
+        return self._photo
+
+    def render_display(self, frame):
+        """
+        Downscale a frame to display_width and draw the ROI overlay on it.
+        Returns an RGB array that is reused by the next call.
+
+        Large frames are first halved with INTER_AREA (OpenCV has a fast
+        path for exact 2x reductions) and only the last step is a bilinear
+        resize, which is about 8x cheaper than one INTER_AREA resize from
+        1080p while still averaging away aliasing.
+        """
+        fh, fw = frame.shape[:2]
+        target = self.display_width
+        if fw > target:
+            self.display_scale = target / fw
+            size = (target, int(fh * self.display_scale))
+        else:
+            self.display_scale = 1.0
+            size = (fw, fh)
+
+        self.display_size = size
+        shape = (size[1], size[0], 3)
+        if self._display_buf is None or self._display_buf.shape != shape:
+            self._display_buf = np.empty(shape, np.uint8)
+            self._rgb_buf = np.empty(shape, np.uint8)
+
+        if size == (fw, fh):
+            np.copyto(self._display_buf, frame)
+        else:
+            img = frame
+            level = 0
+            while img.shape[1] // 2 >= target:
+                half = (img.shape[0] // 2, img.shape[1] // 2, 3)
+                if len(self._half_bufs) <= level:
+                    self._half_bufs.append(None)
+                if self._half_bufs[level] is None or self._half_bufs[level].shape != half:
+                    self._half_bufs[level] = np.empty(half, np.uint8)
+                cv2.resize(img, (half[1], half[0]), dst=self._half_bufs[level],
+                           interpolation=cv2.INTER_AREA)
+                img = self._half_bufs[level]
+                level += 1
+            if img.shape[:2] == shape[:2]:
+                np.copyto(self._display_buf, img)
+            else:
+                cv2.resize(img, size, dst=self._display_buf, interpolation=cv2.INTER_LINEAR)
+
+        overlay, mask = self._get_overlay(shape)
+        cv2.copyTo(overlay, mask, self._display_buf)
+        cv2.cvtColor(self._display_buf, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        return self._rgb_buf
+
+    def _get_overlay(self, shape):
+        """Overlay layer + mask, redrawn only when the ROIs to show change"""
+        positions = self.tracker.snapshot() if self.tracker else {}
+        tracked = tuple(box for box, _ in positions.values())
+        key = (shape, self.display_scale, self.frame_size,
+               tuple((ref["name"], tuple(ref["roi"])) for ref in self.references if ref.get("roi")),
+               self.current_roi, self.temp_roi, tracked, tuple(self.proposals))
+        if key != self._overlay_key:
+            self._overlay_key = key
+            self._overlay = np.zeros(shape, np.uint8)
+            self._draw_overlay(self._overlay, self.display_scale, positions)
+            self._overlay_mask = cv2.cvtColor(self._overlay, cv2.COLOR_BGR2GRAY)
+        return self._overlay, self._overlay_mask
+
+    def _draw_overlay(self, img, scale, positions):
+        def scaled(roi, in_frame=False):
+            return tuple(int(v * scale) for v in (roi if in_frame else self.frame_roi(roi)))
+        font_scale = max(scale, 0.5)
+
+        # Proposed text regions (cyan, numbered)
+        for i, box in enumerate(self.proposals, 1):
+            x, y, w, h = scaled(box, in_frame=True)
+            cv2.rectangle(img, (x, y), (x + w, y + h), (255, 255, 0), 1)
+            cv2.putText(img, str(i), (x, y - 4),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6 * font_scale, (255, 255, 0), 1)
+
+        # Draw saved / loaded reference ROIs (green), where the tracker last saw them
         for ref in self.references:
-            if ref.get("roi"):
-                x, y, w, h = ref["roi"]
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 100), 2)
-                cv2.putText(frame, ref["name"], (x, y - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 100), 2)
+            roi = self.ref_roi(ref)
+            if roi:
+                tracked = positions.get(ref_key(ref))
+                x, y, w, h = scaled(tracked[0], in_frame=True) if tracked else scaled(roi)
+                cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 100), 2)
+                cv2.putText(img, ref["name"], (x, y - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7 * font_scale, (0, 255, 100), 2)
 
         # Draw current active ROI (yellow/orange)
         if self.current_roi:
-            x, y, w, h = self.current_roi
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 180, 255), 3)
-            cv2.putText(frame, "ACTIVE", (x, y - 25),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 180, 255), 2)
+            x, y, w, h = scaled(self.current_roi)
+            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 180, 255), 3)
+            cv2.putText(img, "ACTIVE", (x, y - 25),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8 * font_scale, (0, 180, 255), 2)
 
         # Draw temporary drag rectangle (blue dashed)
         if self.temp_roi:
-            x, y, w, h = self.temp_roi
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 120, 0), 2)
+            x, y, w, h = scaled(self.temp_roi)
+            cv2.rectangle(img, (x, y), (x + w, y + h), (255, 120, 0), 2)
             # Optional: dashed effect simulation with lines
             for i in range(0, w, 15):
-                cv2.line(frame, (x + i, y), (x + i + 8, y), (255, 120, 0), 2)
-                cv2.line(frame, (x + i, y + h), (x + i + 8, y + h), (255, 120, 0), 2)
+                cv2.line(img, (x + i, y), (x + i + 8, y), (255, 120, 0), 2)
+                cv2.line(img, (x + i, y + h), (x + i + 8, y + h), (255, 120, 0), 2)
             for i in range(0, h, 15):
-                cv2.line(frame, (x, y + i), (x, y + i + 8), (255, 120, 0), 2)
-                cv2.line(frame, (x + w, y + i), (x + w, y + i + 8), (255, 120, 0), 2)
-
-        # Resize for display
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil = Image.fromarray(rgb)
-
-        if pil.width > DISPLAY_WIDTH:
-            ratio = DISPLAY_WIDTH / pil.width
-            new_size = (DISPLAY_WIDTH, int(pil.height * ratio))
-            pil = pil.resize(new_size, Image.LANCZOS)
-            self.display_scale = ratio
-        else:
-            self.display_scale = 1.0
-
-        return ImageTk.PhotoImage(pil)
+                cv2.line(img, (x, y + i), (x, y + i + 8), (255, 120, 0), 2)
+                cv2.line(img, (x + w, y + i), (x + w, y + i + 8), (255, 120, 0), 2)
 
     def check_reference(self):
         """
@@ -110,10 +603,10 @@ class CameraApp:
         if self.current_roi is None:
             return "No ROI selected"
 
-        x, y, w, h = self.current_roi
+        x, y, w, h = self.frame_roi(self.current_roi)
 
-        ret, frame = self.cap.read()
-        if not ret:
+        _, frame = self.frame_for_check()
+        if frame is None:
             return "Failed to capture frame"
 
         # Crop ROI
@@ -122,43 +615,227 @@ class CameraApp:
         if roi.size == 0:
             return "Invalid ROI size"
 
-        # Preprocessing to improve OCR accuracy
-        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        
-        # Optional: try adaptive threshold or simple binary
-        # thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-        
-        # or denoising + contrast
-        denoised = cv2.fastNlMeansDenoising(gray, h=10)
-        enhanced = cv2.equalizeHist(denoised)
-
-        # OCR
-        try:
-            # You can customize config: --psm 6 or 7 or 8 depending on text layout
-            ocr_result = pytesseract.image_to_string(
-                enhanced,
-                config='--psm 6 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-/ '
-            ).strip()
-        except Exception as e:
-            return f"OCR error: {str(e)}"
-
-        if not ocr_result:
-            ocr_result = "(nothing detected)"
-
-        # Simple exact match (case insensitive)
-        expected = self.expected_text.strip().lower()
-        found = ocr_result.lower()
-
-        if expected and found == expected:
-            return "✅ MATCH - Reference OK"
-        
-        # Optional: show similarity percentage if not exact match
-        similarity = SequenceMatcher(None, found, expected).ratio()
-        if similarity > 0.85:
-            return (f"⚠️ CLOSE MATCH ({int(similarity*100)}%)\n"
-                    f"Found: {ocr_result}\n"
-                    f"Expected: {self.expected_text}")
-        
-        return (f"❌ MISMATCH\n"
-                f"Found: {ocr_result}\n"
-                f"Expected: {self.expected_text}")
+        return ocr.format_result(ocr.run_check(roi, self.expected_text, pipeline=self.preprocess))
+
+    def crop_roi(self, roi=None):
+        """
+        Copy of the given ROI (default: current_roi) from the newest frame,
+        safe to hand to another thread. Returns None if nothing to crop.
+        """
+        roi = roi or self.current_roi
+        if roi is None:
+            return None
+        _, frame = self.frame_for_check()
+        if frame is None:
+            return None
+        x, y, w, h = self.frame_roi(roi)
+        crop = frame[y:y+h, x:x+w]
+        if crop.size == 0:
+            return None
+        return crop.copy()
+
+    def crop_reference(self, ref):
+        """crop_roi() for a reference, following the part when tracking is on"""
+        _, frame = self.frame_for_check()
+        if frame is None:
+            return None
+        box = self.frame_box(ref, frame)
+        if box is None:
+            return None
+        x, y, w, h = box
+        crop = frame[y:y+h, x:x+w]
+        return crop.copy() if crop.size else None
+
+    def crop_references(self, frame=None):
+        """
+        Crop every reference ROI from the same frame (default: the newest).
+        Returns a list of (reference, crop) pairs, skipping empty ROIs.
+        """
+        if frame is None:
+            _, frame = self.frame_for_check()
+        if frame is None:
+            return []
+        crops = []
+        for ref in self.references:
+            if not ref.get("roi"):
+                continue
+            x, y, w, h = self.frame_box(ref, frame)
+            crop = frame[y:y+h, x:x+w]
+            if crop.size:
+                crops.append((ref, crop.copy()))
+        return crops
+
+    def submit_references(self, executor, frame=None, boxes=None):
+        """
+        Queue the OCR of reference ROIs of one frame (default: the newest)
+        on an ocr_module.OcrExecutor without blocking the caller: one task
+        preprocesses them together with self.preprocessor, then queues
+        their OCR. boxes: [(reference, frame box)], default every reference
+        with a ROI. Returns [(reference, crop, future)] where crop is a copy
+        for the archive (a view would keep the whole frame alive while the
+        record waits in its queue); the preprocessed images go back to the
+        preprocessor once their OCR is done.
+        """
+        if frame is None:
+            _, frame = self.frame_for_check()
+        if frame is None:
+            return []
+        if boxes is None:
+            boxes = [(ref, self.frame_box(ref, frame)) for ref in self.references if ref.get("roi")]
+        boxes = [(ref, (x, y, w, h)) for ref, (x, y, w, h) in boxes if frame[y:y+h, x:x+w].size]
+        if not boxes:
+            return []
+        submitted = [(ref, frame[y:y+h, x:x+w].copy(), Future()) for ref, (x, y, w, h) in boxes]
+        futures = [future for _, _, future in submitted]
+
+        def failed(task):
+            for future in futures:
+                if task.cancelled():
+                    future.cancel()
+                elif not future.done():
+                    future.set_exception(task.exception())
+        task = executor.submit_group([(self._prepare_references, (executor, frame, boxes, futures), {})],
+                                     client=self.name)[0]
+        task.add_done_callback(lambda task: failed(task) if task.cancelled() or task.exception() else None)
+        return submitted
+
+    def _prepare_references(self, executor, frame, boxes, futures):
+        """OCR worker task of submit_references(): batch preprocessing, then one OCR job per ROI"""
+        # A broken pipeline spec fails its own reference, not the batch
+        valid = []
+        for (ref, box), future in zip(boxes, futures):
+            try:
+                pre.resolve_pipeline(ref.get('preprocess'))
+            except ValueError as e:
+                future.set_exception(e)
+                continue
+            valid.append((ref, box, future))
+        start = time.perf_counter()
+        images = self.preprocessor.process(
+            frame, [(ref_key(ref), box, ref.get('preprocess')) for ref, box, _ in valid])
+        seconds = time.perf_counter() - start
+        perf.record("preprocess_batch", seconds)
+
+        pending = []
+        for (ref, _, future), image in zip(valid, images):
+            if image is None:
+                future.cancel()
+            else:
+                pending.append((ref, image, future))
+        jobs = executor.submit_batch([(ref, image) for ref, image, _ in pending],
+                                     client=self.name, preprocessed=True)
+        for (ref, image, future), job in zip(pending, jobs):
+            job.add_done_callback(
+                lambda job, key=ref_key(ref), image=image, future=future:
+                    self._finish_reference(job, key, image, future, seconds))
+
+    def _finish_reference(self, job, key, image, future, preprocess_seconds):
+        self.preprocessor.release(key, image)
+        if job.cancelled():
+            future.cancel()
+        elif job.exception() is not None:
+            future.set_exception(job.exception())
+        else:
+            # Its share of the latency: the whole batch preprocessing it waited for
+            result = job.result()
+            result['timings']['preprocess'] = preprocess_seconds
+            result['elapsed'] += preprocess_seconds
+            future.set_result(result)
+
+
+class PreviewPacer:
+    """
+    Schedules the GUI preview refresh instead of a fixed after(30).
+
+    The refresh rate is target_fps, capped by the camera's measured fps
+    and by twice the (smoothed) render cost, so the preview never takes
+    more than half of the Tk thread. While OCR work is in flight it drops
+    to busy_fps, and while the window is hidden to hidden_fps, leaving the
+    cores to inspection. A tick that starts more than one interval late
+    (Tk loop behind) skips rendering instead of trying to catch up.
+    """
+
+    def __init__(self, target_fps=25.0, busy_fps=5.0, hidden_fps=1.0):
+        self.target_fps = target_fps
+        self.busy_fps = busy_fps
+        self.hidden_fps = hidden_fps
+        self.render_cost = 0.0         # smoothed seconds per refresh
+        self.fps = target_fps          # rate chosen for the current tick
+        self.skipped = 0
+        self._due = None
+
+    def interval(self, camera_fps=0.0, busy=False, visible=True):
+        fps = self.target_fps
+        if camera_fps:
+            fps = min(fps, camera_fps)
+        if busy:
+            fps = min(fps, self.busy_fps)
+        if not visible:
+            fps = min(fps, self.hidden_fps)
+        if self.render_cost:
+            fps = min(fps, 0.5 / self.render_cost)
+        self.fps = max(fps, 0.1)
+        return 1.0 / self.fps
+
+    def should_render(self, now, visible=True):
+        """False when this tick is late by more than an interval, or hidden"""
+        late = self._due is not None and now - self._due > 1.0 / self.fps
+        if late:
+            self.skipped += 1
+        return visible and not late
+
+    def record(self, seconds):
+        """Cost of one refresh (render + Tk update)"""
+        self.render_cost = seconds if not self.render_cost else 0.8 * self.render_cost + 0.2 * seconds
+
+    def next_delay(self, now, elapsed, camera_fps=0.0, busy=False, visible=True):
+        """Milliseconds until the next tick, given how long this one took"""
+        interval = self.interval(camera_fps, busy, visible)
+        delay = max(0.001, interval - elapsed)
+        self._due = now + delay
+        return int(delay * 1000)
+
+
+class CameraManager:
+    """
+    Several cameras inspected at once. Each CameraApp keeps its own capture
+    thread, latest-frame slot and reference list; OCR for all of them goes
+    through one shared OcrExecutor, scheduled fairly by camera name.
+    """
+
+    def __init__(self):
+        self.cameras = []
+
+    def __len__(self):
+        return len(self.cameras)
+
+    def __iter__(self):
+        return iter(self.cameras)
+
+    def __getitem__(self, index):
+        return self.cameras[index]
+
+    def add(self, name=None):
+        camera = CameraApp(name=name or f"camera{len(self.cameras)}", index=len(self.cameras))
+        self.cameras.append(camera)
+        return camera
+
+    def assign_references(self, references):
+        """Give every camera the references drawn on it ('camera' index, default 0)"""
+        for camera in self.cameras:
+            camera.references = [r for r in references if r.get('camera', 0) == camera.index]
+            camera._aspect_checked.clear()
+            camera.preprocessor.reset()
+
+    def start_all(self, sources, **capture_options):
+        """Start camera i on sources[i] (see CameraApp.start_camera)"""
+        for camera, source in zip(self.cameras, sources):
+            camera.start_camera(source=source, **capture_options)
+
+    def stop_all(self):
+        for camera in self.cameras:
+            camera.stop_camera()
+
+    @property
+    def frames_dropped(self):
+        return sum(camera.frames_dropped for camera in self.cameras)
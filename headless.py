@@ -0,0 +1,172 @@
+"""
+Headless inspection: batch-check every reference without a display.
+
+    python headless.py --source 0 --rate 2
+    python headless.py --source line3.mp4 --output results.jsonl
+    python headless.py --source frames/ --rate 0      # every image, as fast as possible
+    python headless.py --source gst:/dev/video0 --upstream-crop --decode-on-demand
+
+One JSON object per checked reference is written to stdout (or --output).
+Camera sources are sampled at --rate batches per second; video files and
+image folders are replayed frame by frame, capped at --rate.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import CancelledError
+
+import archive_module as arch
+import camera_module as cam
+import locate_module as loc
+import ocr_module as ocr
+import reference_module as refs
+import source_module as src
+from perf_module import PeriodicDumper, perf
+
+
+def live_frames(camera, rate, stop_at):
+    """
+    Newest frame from the capture thread, every 1/rate seconds. With
+    camera.decode_fps = 0 the frame is decoded only when it is asked for.
+    """
+    interval = 1.0 / rate if rate else 0.0
+    last_seq = 0
+    next_time = time.monotonic()
+    while camera.is_running and time.monotonic() < stop_at:
+        now = time.monotonic()
+        if next_time > now:
+            time.sleep(next_time - now)
+        next_time = max(next_time + interval, time.monotonic())
+        seq, frame = camera.frame_for_check()
+        if frame is None or seq == last_seq:
+            time.sleep(0.005)
+            continue
+        last_seq = seq
+        yield seq, frame
+
+
+def replay_frames(source, rate, stop_at):
+    """Every frame of a file source, at most `rate` per second"""
+    interval = 1.0 / rate if rate else 0.0
+    next_time = time.monotonic()
+    for seq, frame in enumerate(source, 1):
+        if time.monotonic() >= stop_at:
+            return
+        now = time.monotonic()
+        if next_time > now:
+            time.sleep(next_time - now)
+        next_time = max(next_time + interval, time.monotonic())
+        yield seq, frame
+
+
+def run(args, out):
+    camera = cam.CameraApp()
+    camera.references = [r for r in refs.load_references(args.references) if r.get("roi")]
+    if not camera.references:
+        print(f"No references with a ROI in {args.references}", file=sys.stderr)
+        return 1
+
+    if args.track:
+        camera.tracker = loc.RoiTracker()
+    resolution = args.resolution or refs.capture_resolution(camera.references, src.CAMERA_RESOLUTION)
+    crop = None
+    if args.upstream_crop:
+        crop = refs.roi_bounds(camera.references, resolution)
+    source = src.open_source(args.source, fps=args.source_fps, loop=args.loop,
+                             resolution=resolution, fourcc=args.fourcc, crop=crop)
+    if not source.isOpened():
+        print(f"Could not open source {args.source}", file=sys.stderr)
+        return 1
+
+    executor = ocr.OcrExecutor(max_workers=args.workers)
+    archive = arch.InspectionArchive(args.archive, store_crops=args.archive_crops) if args.archive else None
+    dumper = None
+    if args.perf_dump:
+        perf.enabled = True
+        perf.add_gauge("ocr_queue_depth", lambda: executor.queue_depth)
+        dumper = PeriodicDumper(perf, args.perf_dump, args.perf_interval)
+        dumper.start()
+    stop_at = time.monotonic() + args.duration if args.duration else float("inf")
+    if src.is_live(source):
+        if args.decode_on_demand:
+            camera.decode_fps = 0
+        camera.start_camera(source=source)
+        frames = live_frames(camera, args.rate, stop_at)
+    else:
+        frames = replay_frames(source, args.rate, stop_at)
+
+    batches = 0
+    try:
+        for seq, frame in frames:
+            timestamp = time.time()
+            for ref, crop, future in camera.submit_references(executor, frame):
+                try:
+                    result = future.result()
+                except CancelledError:
+                    continue
+                if archive is not None:
+                    archive.record(result, ref, crop)
+                record = {'timestamp': timestamp, 'frame': seq, **result}
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            batches += 1
+            if args.count and batches >= args.count:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        camera.stop_camera()
+        source.release()
+        executor.shutdown()
+        if archive is not None:
+            archive.close()
+        if dumper is not None:
+            dumper.stop()
+            perf.dump(args.perf_dump)
+    return 0
+
+
+def parse_resolution(text):
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", default="0", help="camera index, video file or image folder")
+    parser.add_argument("--references", default=refs.REFERENCES_DB, help="reference database or .json file")
+    parser.add_argument("--rate", type=float, default=1.0, help="batch checks per second, 0 = no limit")
+    parser.add_argument("--count", type=int, default=0, help="stop after N batches")
+    parser.add_argument("--duration", type=float, default=0, help="stop after N seconds")
+    parser.add_argument("--output", help="JSON lines file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="OCR worker threads (default: one per core)")
+    parser.add_argument("--source-fps", type=float, default=None,
+                        help="replay speed for file sources, capture rate for cameras")
+    parser.add_argument("--resolution", type=parse_resolution, default=None,
+                        help="camera capture size as WIDTHxHEIGHT (default 1920x1080)")
+    parser.add_argument("--fourcc", default=None, help="camera pixel format (default MJPG)")
+    parser.add_argument("--decode-on-demand", action="store_true",
+                        help="only decode camera frames that are checked (others are grabbed and dropped)")
+    parser.add_argument("--track", action="store_true",
+                        help="follow shifted parts: re-locate each ROI by template matching")
+    parser.add_argument("--upstream-crop", action="store_true",
+                        help="with a gst:/dev/videoN source, crop to the reference ROIs inside GStreamer")
+    parser.add_argument("--loop", action="store_true", help="restart file sources at the end")
+    parser.add_argument("--archive", help="also record every check in this archive directory")
+    parser.add_argument("--archive-crops", action="store_true", help="store ROI crops (JPEG) in the archive")
+    parser.add_argument("--perf-dump", help="write stage timings here periodically (.prom = Prometheus text, else JSON)")
+    parser.add_argument("--perf-interval", type=float, default=10.0, help="seconds between perf dumps")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "a") as out:
+            return run(args, out)
+    return run(args, sys.stdout)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import itertools
+import threading
+
+import matcher_module as matcher
+import search_module as search
+
+CANDIDATES = 64         # index hits re-scored with the full matcher
+MAX_POSTING = 5000      # grams shared by more references than this are skipped
+
+
+def grams(text):
+    """Padded 3-grams of the canonical form, so O/0, I/1, ... hit the same grams"""
+    padded = f"  {matcher.canonical(matcher.normalize(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ReferenceIdentifier:
+    """
+    Finds which references an OCR result most likely belongs to.
+
+    A search_module.TrigramIndex over every expected_text (canonical
+    grams) narrows the catalogue down to CANDIDATES references, which are
+    then scored with matcher_module like a normal check. Wildcard / regex
+    candidates are matched directly, and so is every regex without fixed
+    text on each query. Safe to query from OCR workers while
+    the GUI edits references.
+    """
+
+    def __init__(self, references=()):
+        self._lock = threading.RLock()
+        self.rebuild(references)
+
+    def rebuild(self, references=()):
+        with self._lock:
+            self._rebuild(references)
+
+    def _rebuild(self, references):
+        self.refs = {}               # item id -> reference dict
+        self.patterns = {}           # item id -> ExpectedPattern
+        self._unindexed = set()      # patterns without fixed text, tried on every query
+        self._by_ref = {}            # id(reference dict) -> item id
+        self._next_id = 0
+        self.trigrams = search.TrigramIndex(grams, MAX_POSTING)
+        for ref in references:
+            self._add(ref)
+
+    def __len__(self):
+        return len(self.refs)
+
+    def add(self, ref):
+        with self._lock:
+            return self._add(ref)
+
+    def _add(self, ref):
+        item_id = self._next_id
+        self._next_id += 1
+        pattern = matcher.compile_expected(ref['expected_text'])
+        self.refs[item_id] = ref
+        self.patterns[item_id] = pattern
+        self._by_ref[id(ref)] = item_id
+        if pattern.literal:
+            self.trigrams.add(item_id, pattern.literal)
+        elif pattern.regex is not None:
+            self._unindexed.add(item_id)
+        return item_id
+
+    def remove(self, ref):
+        with self._lock:
+            item_id = self._by_ref.pop(id(ref), None)
+            if item_id is not None:
+                del self.refs[item_id]
+                del self.patterns[item_id]
+                self._unindexed.discard(item_id)
+                self.trigrams.remove(item_id)
+
+    def update(self, ref):
+        with self._lock:
+            self.remove(ref)
+            self._add(ref)
+
+    def candidates(self, found, limit=CANDIDATES):
+        """Item ids sharing the most grams with `found` (Dice score), best first"""
+        return [item_id for item_id, _ in self.trigrams.lookup(found, limit)]
+
+    def identify(self, found, k=5):
+        """Top-k (reference, similarity) pairs for an OCR result, best first"""
+        found = matcher.normalize(found)
+        if not found:
+            return []
+        with self._lock:
+            return self._identify(found, k)
+
+    def _identify(self, found, k):
+        ids = self.candidates(found)
+        scored = {}
+        if ids:
+            literals = [self.patterns[i].literal for i in ids]
+            for item_id, score in zip(ids, matcher.score_many(found, literals)):
+                scored[item_id] = float(score)
+        # Wildcards are found through their fixed text like literals; only
+        # patterns without any are tried on every query
+        for item_id in itertools.chain(ids, self._unindexed):
+            pattern = self.patterns[item_id]
+            if pattern.regex is not None and pattern.matches(found):
+                scored[item_id] = 1.0
+        ranked = sorted(scored, key=lambda i: -scored[i])[:k]
+        return [(self.refs[i], scored[i]) for i in ranked]
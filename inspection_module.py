@@ -0,0 +1,137 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+SIGNATURE_SIZE = (16, 16)
+
+
+def ref_key(ref):
+    """Reference names are not unique, so a reference is keyed by name + ROI"""
+    return ref['name'], tuple(ref['roi'])
+
+
+def roi_signature(crop):
+    """Cheap content fingerprint: tiny grayscale thumbnail of the crop"""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def signature_distance(a, b):
+    """Mean absolute difference between two signatures (0-255)"""
+    return float(np.abs(a - b).mean())
+
+
+class AutoInspector:
+    """
+    Continuous inspection driven by the capture thread.
+
+    Every check_interval seconds each reference ROI is reduced to a 16x16
+    signature. OCR is queued only when the ROI content differs from the
+    last OCR'd crop (and has stopped moving), or when recheck_interval has
+    passed without a change. The latest result per reference is kept in
+    `results` so the GUI can show it without waiting for OCR.
+    """
+
+    def __init__(self, camera, executor, change_threshold=6.0,
+                 check_interval=0.1, recheck_interval=10.0, on_result=None):
+        self.camera = camera
+        self.executor = executor
+        self.on_result = on_result     # called as on_result(result, ref, crop) from a worker
+        self.change_threshold = change_threshold
+        self.check_interval = check_interval
+        self.recheck_interval = recheck_interval
+        self.enabled = False
+
+        self.results = {}          # ref_key -> last result dict
+        self.version = 0           # bumped on every new result
+        self._ocr_signatures = {}  # ref_key -> signature of the last OCR'd crop
+        self._prev_signatures = {} # ref_key -> signature from the previous pass
+        self._last_ocr = {}        # ref_key -> time of the last OCR submission
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._last_pass = 0.0
+
+        self.ocr_runs = 0
+        self.skipped = 0
+
+    def start(self):
+        self.enabled = True
+        if self.on_frame not in self.camera.frame_callbacks:
+            self.camera.frame_callbacks.append(self.on_frame)
+
+    def stop(self):
+        self.enabled = False
+        if self.on_frame in self.camera.frame_callbacks:
+            self.camera.frame_callbacks.remove(self.on_frame)
+
+    def reset(self):
+        """Forget cached results, e.g. after the reference list changed"""
+        with self._lock:
+            self.results.clear()
+            self._ocr_signatures.clear()
+            self._prev_signatures.clear()
+            self._last_ocr.clear()
+            self.version += 1
+
+    def on_frame(self, seq, frame):
+        """Capture-thread hook: decide which ROIs need OCR on this frame"""
+        now = time.monotonic()
+        if not self.enabled or now - self._last_pass < self.check_interval:
+            return
+        self._last_pass = now
+
+        to_check = []
+        for ref in list(self.camera.references):
+            if not ref.get("roi"):
+                continue
+            key = ref_key(ref)
+            if key in self._in_flight:
+                continue
+            x, y, w, h = self.camera.frame_box(ref, frame)
+            crop = frame[y:y+h, x:x+w]
+            if crop.size == 0:
+                continue
+
+            sig = roi_signature(crop)
+            prev = self._prev_signatures.get(key)
+            self._prev_signatures[key] = sig
+            if prev is not None and signature_distance(sig, prev) > self.change_threshold:
+                continue    # still moving, wait for the part to settle
+
+            last = self._ocr_signatures.get(key)
+            changed = last is None or signature_distance(sig, last) > self.change_threshold
+            due = now - self._last_ocr.get(key, 0.0) >= self.recheck_interval
+            if not changed and not due:
+                self.skipped += 1
+                continue
+
+            self._ocr_signatures[key] = sig
+            self._last_ocr[key] = now
+            self._in_flight.add(key)
+            to_check.append((ref, (x, y, w, h)))
+
+        if not to_check:
+            return
+        # Preprocessed as one batch into the camera's reused buffers
+        for ref, crop, future in self.camera.submit_references(self.executor, frame, to_check):
+            key = ref_key(ref)
+            future.add_done_callback(lambda f, key=key, ref=ref, crop=crop: self._on_result(key, f, ref, crop))
+        self.ocr_runs += len(to_check)
+
+    def _on_result(self, key, future, ref, crop):
+        self._in_flight.discard(key)
+        if future.cancelled() or future.exception() is not None:
+            # Force a new OCR next pass
+            self._ocr_signatures.pop(key, None)
+            return
+        with self._lock:
+            self.results[key] = future.result()
+            self.version += 1
+        if self.on_result is not None:
+            self.on_result(future.result(), ref, crop)
+
+    def latest_results(self):
+        with self._lock:
+            return list(self.results.values())
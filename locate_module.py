@@ -0,0 +1,172 @@
+import base64
+import threading
+
+import cv2
+import numpy as np
+
+DETECT_WIDTH = 640        # text detection runs on a frame scaled to this width
+TRACK_HEIGHT = 32         # templates are matched at this height
+TRACK_MARGIN = 0.5        # search window = ROI grown by this fraction per side
+TRACK_MIN_SCORE = 0.6     # below this the ROI stays where it was drawn
+
+
+def _gray(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+
+def _glyph_height(bw):
+    """Median height of the character-sized blobs of a binary edge image (0 if none)"""
+    _, _, stats, _ = cv2.connectedComponentsWithStats(bw, connectivity=8)
+    heights = [h for _, _, w, h, area in stats[1:]
+               if 6 <= h <= bw.shape[0] // 4 and w <= 3 * h and area >= 0.2 * w * h]
+    return int(np.median(heights)) if heights else 0
+
+
+def detect_text_regions(frame, max_regions=10, detect_width=DETECT_WIDTH, padding=4):
+    """
+    Boxes (x, y, w, h) in frame pixels that look like lines of text, largest
+    first. Morphological gradient + Otsu finds the strokes; long straight
+    edges (label borders) are removed, then a horizontal closing as wide
+    as a glyph is high joins the characters and words of a line into one
+    blob. Blobs with a text-like aspect ratio and fill are kept. Runs on
+    a downscaled frame (a few ms at 1080p).
+    """
+    gray = _gray(frame)
+    fh, fw = gray.shape
+    scale = min(1.0, detect_width / fw)
+    small = cv2.resize(gray, (int(fw * scale), int(fh * scale)), interpolation=cv2.INTER_AREA) \
+        if scale < 1.0 else gray
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    grad = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, kernel)
+    _, bw = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    glyph = max(9, _glyph_height(bw))
+    # Straight edges longer than two glyphs (label borders, part edges)
+    # would join the text to them: take them out first
+    for size in ((2 * glyph + 1, 1), (1, 2 * glyph + 1)):
+        lines = cv2.morphologyEx(bw, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, size))
+        bw = cv2.subtract(bw, lines)
+    joined = cv2.morphologyEx(bw, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (glyph, 1)))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+
+    boxes = []
+    for x, y, w, h, _ in stats[1:]:
+        if h < 8 or w < 1.5 * h or w > 40 * h:
+            continue
+        fill = cv2.countNonZero(bw[y:y+h, x:x+w]) / float(w * h)
+        if fill < 0.3:
+            continue
+        boxes.append((int(w * h), int(x), int(y), int(w), int(h)))
+    boxes.sort(reverse=True)
+
+    regions = []
+    for _, x, y, w, h in boxes[:max_regions]:
+        x0 = max(0, int(x / scale) - padding)
+        y0 = max(0, int(y / scale) - padding)
+        x1 = min(fw, int((x + w) / scale) + padding)
+        y1 = min(fh, int((y + h) / scale) + padding)
+        regions.append((x0, y0, x1 - x0, y1 - y0))
+    return regions
+
+
+def make_template(crop):
+    """Grayscale template of a ROI crop, TRACK_HEIGHT pixels high"""
+    gray = _gray(crop)
+    h, w = gray.shape
+    width = max(1, int(round(w * TRACK_HEIGHT / h)))
+    return cv2.resize(gray, (width, TRACK_HEIGHT), interpolation=cv2.INTER_AREA)
+
+
+def encode_template(crop):
+    """make_template() as a base64 PNG, small enough to keep in the reference"""
+    ok, buf = cv2.imencode(".png", make_template(crop))
+    return base64.b64encode(buf.tobytes()).decode("ascii") if ok else None
+
+
+def decode_template(text):
+    data = np.frombuffer(base64.b64decode(text), np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+
+
+class RoiTracker:
+    """
+    Keeps reference ROIs on the part when its placement shifts.
+
+    Each reference has a template: its 'template' field (saved with the
+    reference) or, failing that, the ROI content the first time it is seen.
+    locate() matches the template inside the stored ROI grown by `margin`,
+    at TRACK_HEIGHT scale, and returns the ROI moved onto the best match.
+    Poor matches (score < min_score, e.g. no part in view) leave the ROI
+    where it was drawn.
+    """
+
+    def __init__(self, margin=TRACK_MARGIN, min_score=TRACK_MIN_SCORE):
+        self.margin = margin
+        self.min_score = min_score
+        # locate() runs on the capture / OCR threads, the preview reads
+        # positions on the Tk thread: both dicts are only touched under _lock
+        self._lock = threading.Lock()
+        self._templates = {}     # key -> template
+        self.positions = {}      # key -> (box, score) from the last locate()
+        self.located = 0
+        self.lost = 0
+
+    def reset(self):
+        with self._lock:
+            self._templates.clear()
+            self.positions.clear()
+
+    def snapshot(self):
+        """Copy of positions, safe to iterate from any thread"""
+        with self._lock:
+            return dict(self.positions)
+
+    def _template(self, key, ref, frame, box):
+        with self._lock:
+            template = self._templates.get(key)
+        if template is None:
+            if ref.get('template'):
+                template = decode_template(ref['template'])
+            else:
+                x, y, w, h = box
+                crop = frame[y:y+h, x:x+w]
+                if crop.size == 0:
+                    return None
+                template = make_template(crop)
+            with self._lock:
+                template = self._templates.setdefault(key, template)
+        return template
+
+    def locate(self, key, ref, frame, box):
+        """Best placement of `box` (frame pixels) for reference `ref` in `frame`"""
+        x, y, w, h = box
+        template = self._template(key, ref, frame, box)
+        if template is None or template.std() < 2.0:
+            return box      # blank template: nothing to lock on to
+
+        fh, fw = frame.shape[:2]
+        mx, my = max(int(w * self.margin), 8), max(int(h * self.margin), 8)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(fw, x + w + mx), min(fh, y + h + my)
+        scale = TRACK_HEIGHT / h
+        tw = max(1, int(round(w * scale)))
+        if template.shape[1] != tw:
+            template = cv2.resize(template, (tw, TRACK_HEIGHT), interpolation=cv2.INTER_AREA)
+        window = _gray(frame[y0:y1, x0:x1])
+        window = cv2.resize(window, (int((x1 - x0) * scale), int((y1 - y0) * scale)),
+                            interpolation=cv2.INTER_AREA)
+        if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+            return box
+
+        result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (bx, by) = cv2.minMaxLoc(result)
+        if score < self.min_score:
+            with self._lock:
+                self.lost += 1
+                self.positions[key] = (box, score)
+            return box
+        found = (x0 + int(round(bx / scale)), y0 + int(round(by / scale)), w, h)
+        with self._lock:
+            self.located += 1
+            self.positions[key] = (found, score)
+        return found
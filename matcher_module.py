@@ -0,0 +1,153 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from rapidfuzz import process as rf_process
+    from rapidfuzz.distance import Levenshtein as rf_levenshtein
+except ImportError:  # optional: C implementation of the edit distances below
+    rf_process = None
+    rf_levenshtein = None
+
+# Characters Tesseract commonly mixes up, mapped to one representative.
+# A substitution inside a group costs CONFUSION_COST instead of 1.
+CONFUSION_GROUPS = ("0OQD", "1IL", "5S", "8B", "2Z", "6G")
+CONFUSION_COST = 0.3
+
+_CANONICAL = str.maketrans({c: group[0] for group in CONFUSION_GROUPS for c in group[1:]})
+
+# Wildcards allowed in expected_text (none of them can come out of OCR,
+# the whitelist is A-Z 0-9 . - / space). "re:<regex>" is a raw regex.
+WILDCARDS = {"*": ".*", "?": ".", "#": "[0-9]", "@": "[A-Z]"}
+
+
+def normalize(text):
+    return text.strip().upper()
+
+
+def canonical(text):
+    """Collapse OCR-confusable characters (O->0, I->1, S->5, ...)"""
+    return text.translate(_CANONICAL)
+
+
+def _levenshtein(a, b):
+    if rf_levenshtein is not None:
+        return rf_levenshtein.distance(a, b)
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def weighted_distance(found, expected):
+    """
+    Edit distance where confusable substitutions (see CONFUSION_GROUPS)
+    cost CONFUSION_COST. Computed from the plain distance and the distance
+    between canonical forms, so it runs at rapidfuzz speed.
+    """
+    raw = _levenshtein(found, expected)
+    canon = _levenshtein(canonical(found), canonical(expected))
+    return canon + CONFUSION_COST * (raw - canon)
+
+
+def similarity(found, expected):
+    """1.0 = identical, 0.0 = nothing in common (confusion-weighted)"""
+    found, expected = normalize(found), normalize(expected)
+    longest = max(len(found), len(expected))
+    if not longest:
+        return 1.0
+    return max(0.0, 1.0 - weighted_distance(found, expected) / longest)
+
+
+class ExpectedPattern:
+    """Expected text that is either a literal, a wildcard pattern or a regex"""
+
+    def __init__(self, expected):
+        self.expected = normalize(expected)
+        self.regex = None
+        if self.expected.startswith("RE:"):
+            try:
+                self.regex = re.compile(expected.strip()[3:], re.IGNORECASE)
+                self.literal = ""
+            except re.error:
+                # Saved before patterns were validated: compare as plain text
+                self.literal = self.expected[3:]
+        elif any(c in self.expected for c in WILDCARDS):
+            self.regex = re.compile("".join(WILDCARDS.get(c, re.escape(c)) for c in self.expected))
+            self.literal = "".join(c for c in self.expected if c not in WILDCARDS)
+        else:
+            self.literal = self.expected
+
+    def matches(self, found):
+        found = normalize(found)
+        if self.regex is not None:
+            return self.regex.fullmatch(found) is not None
+        return bool(self.literal) and found == self.literal
+
+    def similarity(self, found):
+        if self.matches(found):
+            return 1.0
+        # For patterns, the fixed characters are what we can compare
+        if not self.literal:
+            return 0.0
+        return similarity(found, self.literal)
+
+
+def pattern_error(expected):
+    """Why `expected` can't be used as expected text (a broken re: pattern), None if it can"""
+    if normalize(expected).startswith("RE:"):
+        try:
+            re.compile(expected.strip()[3:], re.IGNORECASE)
+        except re.error as e:
+            return f"Invalid regular expression: {e}"
+    return None
+
+
+@lru_cache(maxsize=4096)
+def compile_expected(expected):
+    return ExpectedPattern(expected)
+
+
+def compare(found, expected, close_threshold):
+    """(verdict, similarity) with verdict MATCH / CLOSE / MISMATCH"""
+    pattern = compile_expected(expected)
+    if pattern.matches(found):
+        return "MATCH", 1.0
+    score = pattern.similarity(found)
+    if score > close_threshold:
+        return "CLOSE", score
+    return "MISMATCH", score
+
+
+def _scores(found, literals, canonicals):
+    found = normalize(found)
+    if not literals:
+        return np.zeros(0)
+    if rf_process is not None:
+        # Spreading over all cores only pays off for big candidate lists
+        workers = -1 if len(literals) > 2000 else 1
+        raw = rf_process.cdist([found], literals, scorer=rf_levenshtein.distance,
+                               workers=workers)[0]
+        canon = rf_process.cdist([canonical(found)], canonicals,
+                                 scorer=rf_levenshtein.distance, workers=workers)[0]
+    else:
+        raw = np.array([_levenshtein(found, c) for c in literals])
+        canon = np.array([_levenshtein(canonical(found), c) for c in canonicals])
+    lengths = np.maximum(len(found), np.array([len(c) for c in literals]))
+    weighted = canon + CONFUSION_COST * (raw - canon)
+    return np.clip(1.0 - weighted / np.maximum(lengths, 1), 0.0, 1.0)
+
+
+def score_many(found, candidates):
+    """
+    Confusion-weighted similarity of one OCR string against many literal
+    candidate texts, as a numpy array in candidate order.
+    """
+    literals = [normalize(c) for c in candidates]
+    return _scores(found, literals, [canonical(c) for c in literals])
@@ -0,0 +1,772 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+import pytesseract
+
+import matcher_module as matcher
+import preprocess_module as pre
+from perf_module import perf
+
+try:
+    import tesserocr
+except ImportError:  # optional: in-process libtesseract bindings
+    tesserocr = None
+
+# --psm 6 = assume a single uniform block of text, --oem 3 = default engine
+OCR_PSM = 6
+OCR_OEM = 3
+OCR_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-/ "
+OCR_CONFIG = f'--psm {OCR_PSM} --oem {OCR_OEM} -c tessedit_char_whitelist={OCR_WHITELIST}'
+CLOSE_MATCH_THRESHOLD = 0.85
+IDENTIFY_TOP_K = 5
+NOTHING_DETECTED = "(nothing detected)"     # 'found' of an empty read
+
+# Voted checks (FrameVote): frames read at most, the verdict lead (in
+# fully confident reads) that settles the vote early, and the minimum
+# spacing between the frames so one glare or blur event doesn't hit them all
+VOTE_FRAMES = 5
+VOTE_MARGIN = 1.5
+VOTE_INTERVAL = 0.05
+
+# "auto" uses tesserocr when it is installed and falls back to pytesseract
+OCR_BACKEND = "auto"
+
+# OCR result cache: entries and seconds to live. Text is only reused for
+# exactly the same preprocessed pixels (a still image, a crop checked
+# again); live camera crops differ by sensor noise and rarely hit.
+OCR_CACHE_SIZE = 512
+OCR_CACHE_TTL = 600.0
+# Near-duplicate reuse, off at 0. Above 0, crops whose perceptual hashes
+# differ by at most OCR_CACHE_MAX_DISTANCE bits are candidates, and one is
+# reused if its mean absolute pixel difference is at most this (entries
+# then keep a copy of the image). Labels one character apart can hash
+# within ~6 of the 512 bits, and equalized sensor noise alone differs by
+# more than a changed glyph, so only enable it for static, noise-free input.
+OCR_CACHE_MAX_PIXEL_DIFF = 0.0
+OCR_CACHE_MAX_DISTANCE = 2
+OCR_CACHE_HASH_GRID = (32, 16)
+
+
+class PytesseractBackend:
+    """Runs the tesseract CLI once per call (temp image + process start)"""
+    name = "pytesseract"
+
+    def image_to_string(self, image):
+        return pytesseract.image_to_string(image, config=OCR_CONFIG)
+
+    def image_to_symbols(self, image):
+        """
+        (text, confidences): one confidence (0-1) per character of text.
+        The CLI only reports word confidences, every character of a word
+        gets its word's.
+        """
+        data = pytesseract.image_to_data(image, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+        words = [(word, float(conf) / 100) for word, conf in zip(data['text'], data['conf'])
+                 if word.strip() and float(conf) >= 0]
+        return _join_words(words)
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """
+    Long-lived libtesseract handle: the language model is loaded once and
+    every call only sets a new image. Not thread-safe, use one per thread.
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang="eng"):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=OCR_PSM, oem=OCR_OEM)
+        self.api.SetVariable("tessedit_char_whitelist", OCR_WHITELIST)
+
+    def _set_image(self, image):
+        image = np.ascontiguousarray(image)
+        h, w = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        if channels == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        self.api.SetImageBytes(image.tobytes(), w, h, channels, w * channels)
+
+    def image_to_string(self, image):
+        self._set_image(image)
+        return self.api.GetUTF8Text()
+
+    def image_to_symbols(self, image):
+        """(text, confidences): Tesseract's own confidence (0-1) for every character"""
+        self._set_image(image)
+        self.api.Recognize()
+        words, word, confs = [], "", []
+        level = tesserocr.RIL.SYMBOL
+        for symbol in tesserocr.iterate_level(self.api.GetIterator(), level):
+            if symbol.IsAtBeginningOf(tesserocr.RIL.WORD) and word:
+                words.append((word, confs))
+                word, confs = "", []
+            text = symbol.GetUTF8Text(level) or ""
+            word += text
+            confs += [symbol.Confidence(level) / 100] * len(text)
+        if word:
+            words.append((word, confs))
+        return _join_words(words)
+
+    def close(self):
+        self.api.End()
+
+
+def _join_words(words):
+    """
+    [(word, confidence or per-character confidences)] -> (text, confidences)
+    with single spaces between words. A space is as certain as the less
+    certain of its neighbours.
+    """
+    text, confidences = [], []
+    for word, conf in words:
+        confs = list(conf) if isinstance(conf, list) else [conf] * len(word)
+        if text:
+            text.append(" ")
+            confidences.append(min(confidences[-1], confs[0]))
+        text.append(word)
+        confidences += confs
+    return "".join(text), confidences
+
+
+def create_backend(name="auto"):
+    """Build an OCR backend by name: auto / tesserocr / pytesseract"""
+    if name in ("auto", "tesserocr"):
+        try:
+            return TesserocrBackend()
+        except RuntimeError as e:
+            if name == "tesserocr":
+                raise
+            if tesserocr is not None:
+                print(f"Warning: tesserocr unavailable ({e}), using pytesseract")
+    elif name != "pytesseract":
+        raise ValueError(f"Unknown OCR backend: {name}")
+    return PytesseractBackend()
+
+
+_thread_backends = threading.local()
+
+
+def get_backend(name=None):
+    """OCR backend for the calling thread, created on first use and then reused"""
+    name = name or OCR_BACKEND
+    backend = getattr(_thread_backends, name, None)
+    if backend is None:
+        backend = create_backend(name)
+        setattr(_thread_backends, name, backend)
+    return backend
+
+
+def warm_up(backend=None):
+    """
+    One throwaway OCR of a blank image, so the engine, its model and the
+    tesseract binary are loaded (and in the page cache) before the first
+    real check
+    """
+    try:
+        (backend or get_backend()).image_to_string(np.full((32, 96), 255, np.uint8))
+    except Exception as e:
+        print(f"Warning: OCR warm-up failed: {e}")
+
+
+def perceptual_hash(image, grid=OCR_CACHE_HASH_GRID):
+    """
+    Average hash of a grayscale image: one bit per grid cell (darker or
+    lighter than the mean), returned as an int. The grid is wider than tall
+    because labels are mostly horizontal text.
+    """
+    small = cv2.resize(image, grid, interpolation=cv2.INTER_AREA)
+    bits = (small > small.mean()).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class OcrCache:
+    """
+    LRU + TTL cache of OCR text for preprocessed images.
+
+    By default only exact duplicates hit: entries are keyed by (config,
+    digest of the pixels), so a lookup is one dict access. With
+    max_pixel_diff > 0, entries are keyed by (config, perceptual hash)
+    instead; a lookup tries the exact hash, then the entries of the same
+    config within max_distance bits, and returns the first one whose pixels
+    are within max_pixel_diff (see OCR_CACHE_MAX_PIXEL_DIFF). Values are
+    short strings (or text plus per-character confidences), plus the image
+    when near matching, so max_entries bounds memory.
+    """
+
+    def __init__(self, max_entries=OCR_CACHE_SIZE, ttl=OCR_CACHE_TTL,
+                 max_distance=OCR_CACHE_MAX_DISTANCE, max_pixel_diff=OCR_CACHE_MAX_PIXEL_DIFF):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.max_pixel_diff = max_pixel_diff
+        self.near = max_pixel_diff > 0
+        self._entries = OrderedDict()   # key -> (text, expires_at, image copy or None)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0               # hash matched but the pixels did not
+
+    def _key(self, config, image):
+        if self.near:
+            return config, perceptual_hash(image)
+        return config, image.shape, hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16).digest()
+
+    def _candidates(self, key):
+        if key in self._entries:
+            yield key
+        if not self.near or self.max_distance <= 0:
+            return
+        config, image_hash = key
+        near = [((other[1] ^ image_hash).bit_count(), other) for other in self._entries
+                if other[0] == config and other != key]
+        for distance, other in sorted(near):
+            if distance > self.max_distance:
+                break
+            yield other
+
+    def _same_pixels(self, stored, image):
+        if stored is None:
+            return True             # keyed on the digest already
+        return stored.shape == image.shape and \
+            float(cv2.absdiff(stored, image).mean()) <= self.max_pixel_diff
+
+    def get(self, config, image):
+        """Cached text for a preprocessed image, None on a miss"""
+        now = time.monotonic()
+        key = self._key(config, image)
+        with self._lock:
+            for other in list(self._candidates(key)):
+                text, expires_at, stored = self._entries[other]
+                if expires_at <= now:
+                    del self._entries[other]
+                    self.expirations += 1
+                    continue
+                if self._same_pixels(stored, image):
+                    self._entries.move_to_end(other)
+                    self.hits += 1
+                    return text
+                self.rejected += 1
+            self.misses += 1
+            return None
+
+    def put(self, config, image, text):
+        key = self._key(config, image)
+        stored = image.copy() if self.near else None
+        with self._lock:
+            self._entries[key] = (text, time.monotonic() + self.ttl, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'rejected': self.rejected,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by all workers, set to None to always run Tesseract
+ocr_cache = OcrCache()
+
+
+def preprocess_roi(roi, pipeline=None):
+    """Run the reference's preprocessing pipeline, returns the image handed to Tesseract"""
+    return pre.apply_pipeline(roi, pipeline)
+
+
+def compare_text(found, expected):
+    """
+    Compare OCR output with the expected text (case insensitive, wildcards
+    and "re:" patterns allowed, see matcher_module).
+    Returns (verdict, similarity) with verdict in MATCH / CLOSE / MISMATCH
+    """
+    return matcher.compare(found, expected, CLOSE_MATCH_THRESHOLD)
+
+
+def run_check(roi, expected_text, backend=None, pipeline=None, confidence=False):
+    """
+    Preprocess + OCR + compare a cropped ROI (BGR).
+    backend defaults to the calling thread's get_backend(), pipeline to
+    preprocess_module.DEFAULT_PIPELINE.
+    Returns a result dict: found, expected_text, similarity, verdict,
+    elapsed, cached and timings (seconds per stage: preprocess, ocr, compare).
+    With confidence=True it also has 'confidences', one 0-1 value per
+    character of found (empty when nothing was read), and their mean
+    'confidence'.
+    """
+    start = time.perf_counter()
+    timings = {}
+    result = {
+        'found': "",
+        'expected_text': expected_text,
+        'similarity': 0.0,
+        'verdict': "ERROR",
+        'elapsed': 0.0,
+        'cached': False,
+        'timings': timings,
+    }
+
+    enhanced = preprocess_roi(roi, pipeline)
+    stage_start = time.perf_counter()
+    timings['preprocess'] = stage_start - start
+    cache = ocr_cache
+    config = OCR_CONFIG + " +symbols" if confidence else OCR_CONFIG
+    found = None
+    if cache is not None:
+        found = cache.get(config, enhanced)
+        result['cached'] = found is not None
+    if found is None:
+        try:
+            backend = backend or get_backend()
+            if confidence:
+                found = backend.image_to_symbols(enhanced)
+            else:
+                found = backend.image_to_string(enhanced).strip()
+        except Exception as e:
+            result['found'] = f"OCR error: {str(e)}"
+            result['elapsed'] = time.perf_counter() - start
+            if pipeline != []:
+                perf.record('preprocess', timings['preprocess'])
+            return result
+        if cache is not None:
+            cache.put(config, enhanced, found)
+
+    if confidence:
+        found, confidences = found
+        result['confidences'] = confidences
+        result['confidence'] = sum(confidences) / len(confidences) if confidences else 0.0
+    if not found:
+        found = NOTHING_DETECTED
+
+    compare_start = time.perf_counter()
+    timings['ocr'] = compare_start - stage_start
+    result['found'] = found
+    result['verdict'], result['similarity'] = compare_text(found, expected_text)
+    end = time.perf_counter()
+    timings['compare'] = end - compare_start
+    result['elapsed'] = end - start
+    for stage, seconds in timings.items():
+        # An already preprocessed roi only went through the gray conversion;
+        # its real cost is in the "preprocess_batch" stage
+        if stage != 'preprocess' or pipeline != []:
+            perf.record(stage, seconds)
+    return result
+
+
+def run_reference_check(ref, roi, pipeline=None):
+    """
+    run_check() for one reference dict, the result also carries its name.
+    pipeline defaults to the reference's own; [] for an already
+    preprocessed roi.
+    """
+    result = run_check(roi, ref['expected_text'],
+                       pipeline=ref.get('preprocess') if pipeline is None else pipeline)
+    result['name'] = ref['name']
+    return result
+
+
+def run_identify(roi, identifier, k=IDENTIFY_TOP_K, pipeline=None):
+    """
+    OCR a cropped ROI once and look the text up in the whole catalogue
+    (an identify_module.ReferenceIdentifier) instead of one expected text.
+    Returns a run_check() result for the best reference (name and
+    expected_text filled in) plus 'candidates', the top-k
+    [(reference dict, similarity)]. A MISMATCH verdict means no reference
+    is close enough.
+    """
+    result = run_check(roi, "", pipeline=pipeline)
+    result['candidates'] = []
+    if result['verdict'] == "ERROR" or result['found'] == NOTHING_DETECTED:
+        return result
+
+    start = time.perf_counter()
+    candidates = identifier.identify(result['found'], k)
+    result['candidates'] = candidates
+    if candidates:
+        best = candidates[0][0]
+        result['name'] = best['name']
+        result['expected_text'] = best['expected_text']
+        result['verdict'], result['similarity'] = compare_text(result['found'], best['expected_text'])
+    seconds = time.perf_counter() - start
+    result['timings']['identify'] = seconds
+    result['elapsed'] += seconds
+    perf.record('identify', seconds)
+    return result
+
+
+def vote_text(reads):
+    """
+    Confidence-weighted consensus of several reads of the same text.
+    reads: [(text, confidences)] as returned by the backends'
+    image_to_symbols(). Reads are grouped by length and the length with
+    the most total confidence wins; within it every position takes the
+    character with the highest confidence sum. Returns (text, confidence),
+    confidence being the mean winning sum per read (1.0 = all reads agree
+    and are certain).
+    """
+    groups = {}
+    for text, confidences in reads:
+        groups.setdefault(len(text), []).append((text, confidences))
+    if not groups:
+        return "", 0.0
+
+    def weight(group):
+        return sum(sum(confs) / len(confs) for _, confs in group if confs)
+    group = max(groups.values(), key=weight)
+
+    chars, scores = [], []
+    for i in range(len(group[0][0])):
+        votes = {}
+        for text, confidences in group:
+            votes[text[i]] = votes.get(text[i], 0.0) + confidences[i]
+        char, score = max(votes.items(), key=lambda item: item[1])
+        chars.append(char)
+        scores.append(score / len(group))
+    return "".join(chars), sum(scores) / len(scores) if scores else 0.0
+
+
+class FrameVote:
+    """
+    One check decided over up to `frames` frames of the same ROI.
+
+    Every frame's crop is queued with submit() and read with per-character
+    confidences, so successive frames run on different workers. Each read
+    votes for its own verdict with its confidence; as soon as one verdict
+    leads the others by `margin`, or the reads left could no longer
+    overturn it, the vote is settled and the remaining reads are
+    cancelled. `future` then holds a run_check() style result for the
+    consensus text (vote_text()) plus 'confidence', 'frames' (reads used)
+    and 'votes' (weight per verdict).
+    """
+
+    def __init__(self, expected_text, frames=VOTE_FRAMES, margin=VOTE_MARGIN):
+        self.expected_text = expected_text
+        self.frames = frames
+        self.margin = margin
+        self.future = Future()
+        self.results = []
+        self.votes = {}              # verdict -> summed read confidence
+        self._futures = []
+        self._errors = []
+        self._finished = 0           # reads done, including failed and cancelled ones
+        self._closed = False
+        self._settling = False
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @property
+    def wants_frame(self):
+        """True while the vote is open and has frames left to read"""
+        return not self._settling and not self._closed and len(self._futures) < self.frames
+
+    def submit(self, executor, roi, pipeline=None, client=None):
+        """Queue the crop of one more frame. Returns False once no more frames are needed."""
+        with self._lock:
+            if not self.wants_frame:
+                return False
+            future = Future()        # placeholder keeps the slot while submitting
+            self._futures.append(future)
+        # Outside the lock: submitting may cancel (and call back) an older read
+        read = executor.submit_check(roi, self.expected_text, pipeline, client, confidence=True)
+        with self._lock:
+            self._futures[self._futures.index(future)] = read
+            if self._settling:
+                read.cancel()
+        read.add_done_callback(self._read_done)
+        return True
+
+    def close(self):
+        """No more frames are coming (camera stopped): decide on the reads submitted so far"""
+        with self._lock:
+            self._closed = True
+            finish = self._should_finish()
+        if finish:
+            self._finish()
+
+    def _lead(self):
+        ranked = sorted(self.votes.values(), reverse=True) + [0.0, 0.0]
+        return ranked[0] - ranked[1]
+
+    def _should_finish(self):
+        if self._settling:
+            return False
+        lead = self._lead()
+        left = self.frames - self._finished     # each read left can add at most 1.0
+        done = self._finished >= len(self._futures) and (self._closed or left <= 0)
+        if done or lead >= self.margin or 0 < lead and left < lead:
+            self._settling = True
+            return True
+        return False
+
+    def _read_done(self, future):
+        with self._lock:
+            self._finished += 1
+            if not future.cancelled() and future.exception() is None:
+                result = future.result()
+                if result['verdict'] == "ERROR":
+                    self._errors.append(result['found'])
+                else:
+                    self.results.append(result)
+                    verdict = result['verdict']
+                    self.votes[verdict] = self.votes.get(verdict, 0.0) + result['confidence']
+            finish = self._should_finish()
+        if finish:
+            self._finish()
+
+    def _finish(self):
+        for read in self._futures:
+            read.cancel()
+        elapsed = time.perf_counter() - self._start
+        perf.record('vote', elapsed)
+        if not self.results:
+            self.future.set_result({
+                'found': self._errors[0] if self._errors else "OCR error: no frame could be read",
+                'expected_text': self.expected_text,
+                'similarity': 0.0,
+                'verdict': "ERROR",
+                'elapsed': elapsed,
+                'cached': False,
+                'timings': {},
+            })
+            return
+
+        text, confidence = vote_text(
+            [(r['found'] if r['confidences'] else "", r['confidences']) for r in self.results])
+        found = text or NOTHING_DETECTED
+        verdict, similarity = compare_text(found, self.expected_text)
+        timings = {}
+        for r in self.results:
+            for stage, seconds in r['timings'].items():
+                timings[stage] = timings.get(stage, 0.0) + seconds
+        self.future.set_result({
+            'found': found,
+            'expected_text': self.expected_text,
+            'similarity': similarity,
+            'verdict': verdict,
+            'elapsed': elapsed,
+            'cached': all(r['cached'] for r in self.results),
+            'timings': timings,
+            'confidence': confidence,
+            'frames': len(self.results),
+            'votes': dict(self.votes),
+        })
+
+
+def format_result(result):
+    """Human readable text for a run_check() result, as shown in the GUI"""
+    verdict = result['verdict']
+    if verdict == "ERROR":
+        return result['found']
+    if verdict == "MATCH":
+        text = "✅ MATCH - Reference OK"
+    elif verdict == "CLOSE":
+        text = (f"⚠️ CLOSE MATCH ({int(result['similarity']*100)}%)\n"
+                f"Found: {result['found']}\n"
+                f"Expected: {result['expected_text']}")
+    else:
+        text = (f"❌ MISMATCH\n"
+                f"Found: {result['found']}\n"
+                f"Expected: {result['expected_text']}")
+    if 'frames' in result:
+        text += f"\n({result['frames']} frames, {int(result['confidence']*100)}% confidence)"
+    return text
+
+
+def format_identify_result(result):
+    """Human readable text for a run_identify() result"""
+    if result['verdict'] == "ERROR":
+        return result['found']
+    candidates = result['candidates']
+    if not candidates or result['verdict'] == "MISMATCH":
+        text = f"❓ UNKNOWN REFERENCE\nFound: {result['found']}"
+        if candidates:
+            text += "\nClosest: " + ", ".join(
+                f"{ref['name']} ({int(score*100)}%)" for ref, score in candidates[:3])
+        return text
+    text = f"🔎 {result['name']}\n" + format_result(result)
+    if len(candidates) > 1:
+        text += "\nAlso: " + ", ".join(
+            f"{ref['name']} ({int(score*100)}%)" for ref, score in candidates[1:4])
+    return text
+
+
+def format_batch_result(results):
+    """One-line-per-reference summary for a batch of run_reference_check() results"""
+    ok = sum(1 for r in results if r['verdict'] == "MATCH")
+    lines = [f"{'✅' if ok == len(results) else '❌'} {ok}/{len(results)} references OK"]
+    for r in results:
+        if r['verdict'] == "MATCH":
+            continue
+        icon = "⚠️" if r['verdict'] == "CLOSE" else "❌"
+        lines.append(f"{icon} {r['name']}: found '{r['found']}', expected '{r['expected_text']}'")
+    return "\n".join(lines)
+
+
+class OcrExecutor:
+    """
+    Small worker pool for OCR checks.
+
+    Submissions wait in a bounded queue per client (e.g. one per camera);
+    when a client's queue is full its oldest waiting submission is
+    cancelled so the newest frames are always the ones being read.
+    Workers take tasks round-robin across clients, so a busy station
+    cannot starve the others. A batch (one frame, many ROIs) counts as a
+    single submission and its ROIs are spread over all workers.
+    Tesseract runs out of process and OpenCV releases the GIL, so threads
+    are enough to keep every core busy.
+    """
+
+    def __init__(self, max_workers=None, max_pending=4):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+
+        self._queues = OrderedDict()   # client -> deque of submissions, each a deque of tasks
+        self._cond = threading.Condition()
+        self._shutdown = False
+
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.running = 0               # tasks a worker is executing right now
+
+        self._workers = []
+        for i in range(self.max_workers):
+            t = threading.Thread(target=self._worker, name=f"ocr-worker-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    @property
+    def queue_depth(self):
+        """Number of tasks waiting for a worker"""
+        with self._cond:
+            return sum(len(group) for pending in self._queues.values() for group in pending)
+
+    @property
+    def busy(self):
+        """True while any task is queued or running"""
+        return bool(self._queues) or self.running > 0
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_group([(fn, args, kwargs)])[0]
+
+    def submit_group(self, calls, client=None):
+        """
+        Queue several (fn, args, kwargs) calls as one submission of
+        `client`. Returns one Future per call, in order.
+        """
+        futures = [Future() for _ in calls]
+        if not calls:
+            return futures
+        group = deque((future, fn, args, kwargs)
+                      for future, (fn, args, kwargs) in zip(futures, calls))
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("OCR executor is shut down")
+            pending = self._queues.setdefault(client, deque())
+            if len(pending) >= self.max_pending:
+                for task in pending.popleft():
+                    task[0].cancel()
+                self.dropped += 1
+            pending.append(group)
+            self.submitted += 1
+            self._cond.notify_all()
+        return futures
+
+    def submit_check(self, roi_frame, expected, pipeline=None, client=None, confidence=False):
+        """Queue run_check() for a cropped ROI, returns a Future of the result dict"""
+        return self.submit_group(
+            [(run_check, (roi_frame, expected), {'pipeline': pipeline, 'confidence': confidence})], client)[0]
+
+    def submit_identify(self, roi_frame, identifier, k=IDENTIFY_TOP_K, pipeline=None, client=None):
+        """Queue run_identify() for a cropped ROI, returns a Future of the result dict"""
+        return self.submit_group(
+            [(run_identify, (roi_frame, identifier), {'k': k, 'pipeline': pipeline})], client)[0]
+
+    def submit_batch(self, crops, client=None, preprocessed=False):
+        """
+        Queue run_reference_check() for every (reference, crop) pair of one
+        frame, the crops already preprocessed if `preprocessed` (see
+        camera_module.RoiPreprocessor). Returns a list of Futures in the
+        same order.
+        """
+        kwargs = {'pipeline': []} if preprocessed else {}
+        return self.submit_group([(run_reference_check, (ref, roi), kwargs) for ref, roi in crops], client)
+
+    def _next_task(self):
+        # Round-robin: take one task from the first client, then send that
+        # client to the back of the line
+        client, pending = next(iter(self._queues.items()))
+        group = pending[0]
+        task = group.popleft()
+        if not group:
+            pending.popleft()
+        if pending:
+            self._queues.move_to_end(client)
+        else:
+            del self._queues[client]
+        return task
+
+    def _worker(self):
+        # Load the OCR engine up front so the first check doesn't pay for it
+        try:
+            get_backend()
+        except Exception as e:
+            print(f"Warning: OCR backend init failed: {e}")
+
+        while True:
+            with self._cond:
+                while not self._queues and not self._shutdown:
+                    self._cond.wait()
+                if self._shutdown:
+                    return
+                future, fn, args, kwargs = self._next_task()
+                self.running += 1
+
+            ran = future.set_running_or_notify_cancel()
+            if ran:
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            with self._cond:
+                self.running -= 1
+                self.completed += ran
+
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._shutdown = True
+            for pending in self._queues.values():
+                for group in pending:
+                    for task in group:
+                        task[0].cancel()
+            self._queues.clear()
+            self._cond.notify_all()
+        if wait:
+            for t in self._workers:
+                t.join()
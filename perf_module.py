@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+from array import array
+from collections import deque
+
+HISTORY = 512            # samples kept per stage
+RATE_WINDOW = 120        # events kept per rate counter
+METRIC_PREFIX = "gui_ocr"
+
+
+class StageStats:
+    """Ring buffer of the last HISTORY durations (seconds) of one stage"""
+
+    def __init__(self, size=HISTORY):
+        self.samples = array("d", bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0       # total ever recorded
+        self.total = 0.0     # sum of all durations ever recorded
+
+    def add(self, seconds):
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+        self.total += seconds
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)):
+        n = min(self.count, self.size)
+        if not n:
+            return {}
+        values = sorted(self.samples[:n])
+        return {q: values[min(n - 1, int(q * n))] for q in quantiles}
+
+
+class RateCounter:
+    """Events per second over the last RATE_WINDOW events"""
+
+    def __init__(self, size=RATE_WINDOW):
+        self.times = deque(maxlen=size)
+
+    def tick(self):
+        self.times.append(time.monotonic())
+
+    def rate(self, idle_after=2.0):
+        times = list(self.times)
+        if len(times) < 2 or time.monotonic() - times[-1] > idle_after:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Timer:
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class PerfRegistry:
+    """
+    Per-stage timings, event rates and gauges. Everything is a no-op while
+    `enabled` is False, so instrumentation can stay in the hot paths.
+
+        with perf.timer("ocr"):
+            ...
+        perf.record("preprocess", seconds)
+        perf.tick("capture")
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.rates = {}
+        self.gauges = {}     # name -> callable returning a number
+        self._lock = threading.Lock()
+
+    def timer(self, stage):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        stats = self.stages.get(stage)
+        if stats is None:
+            with self._lock:
+                stats = self.stages.setdefault(stage, StageStats())
+        stats.add(seconds)
+
+    def tick(self, name):
+        if not self.enabled:
+            return
+        counter = self.rates.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self.rates.setdefault(name, RateCounter())
+        counter.tick()
+
+    def add_gauge(self, name, fn):
+        self.gauges[name] = fn
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.rates.clear()
+
+    def snapshot(self):
+        """Plain dict of the current numbers (milliseconds for durations)"""
+        stages = {}
+        for name, stats in list(self.stages.items()):
+            p = stats.percentiles()
+            stages[name] = {
+                'count': stats.count,
+                'mean_ms': stats.total / stats.count * 1000 if stats.count else 0.0,
+                'p50_ms': p.get(0.5, 0.0) * 1000,
+                'p95_ms': p.get(0.95, 0.0) * 1000,
+                'p99_ms': p.get(0.99, 0.0) * 1000,
+            }
+        gauges = {}
+        for name, fn in list(self.gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception:
+                pass
+        return {
+            'time': time.time(),
+            'stages': stages,
+            'rates': {name: c.rate() for name, c in list(self.rates.items())},
+            'gauges': gauges,
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (for node_exporter's textfile collector)"""
+        lines = [f"# TYPE {METRIC_PREFIX}_stage_seconds summary"]
+        for name, stats in sorted(self.stages.items()):
+            for q, value in stats.percentiles().items():
+                lines.append(f'{METRIC_PREFIX}_stage_seconds{{stage="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{name}"}} {stats.total:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{name}"}} {stats.count}')
+        lines.append(f"# TYPE {METRIC_PREFIX}_events_per_second gauge")
+        for name, counter in sorted(self.rates.items()):
+            lines.append(f'{METRIC_PREFIX}_events_per_second{{name="{name}"}} {counter.rate():.3f}')
+        lines.append(f"# TYPE {METRIC_PREFIX}_gauge gauge")
+        for name, value in sorted(self.snapshot()['gauges'].items()):
+            lines.append(f'{METRIC_PREFIX}_gauge{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write to `path` atomically; .prom files get Prometheus text, others JSON"""
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def format_overlay(self):
+        """Short multi-line summary for the on-screen overlay"""
+        snap = self.snapshot()
+        rates, stages, gauges = snap['rates'], snap['stages'], snap['gauges']
+        lines = [f"capture {rates.get('capture', 0.0):.1f} fps | display {rates.get('display', 0.0):.1f} fps"]
+        for name in ("capture", "display_render", "preprocess", "preprocess_batch", "ocr", "compare"):
+            if name in stages:
+                s = stages[name]
+                lines.append(f"{name}: p50 {s['p50_ms']:.1f} / p95 {s['p95_ms']:.1f} / p99 {s['p99_ms']:.1f} ms")
+        for name, value in gauges.items():
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+
+class PeriodicDumper:
+    """Background thread calling registry.dump(path) every `interval` seconds"""
+
+    def __init__(self, registry, path, interval=10.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="perf-dump", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.registry.dump(self.path)
+            except OSError as e:
+                print(f"Warning: could not write perf dump {self.path}: {e}")
+
+
+# Shared registry used by camera_module, ocr_module and main
+perf = PerfRegistry()
@@ -0,0 +1,142 @@
+import time
+
+import cv2
+
+# A pipeline is a list of stages, each {"op": <name>, **params}, applied to
+# the grayscale ROI in order. References may store their own pipeline (or
+# the name of one of PIPELINES) under "preprocess" in references.json.
+# Pipelines starting with a resize are batched by camera_module.RoiPreprocessor.
+PIPELINES = {
+    # Original check_reference preprocessing, slow on ARM
+    "legacy": [{"op": "denoise", "h": 10}, {"op": "equalize"}],
+    "default": [{"op": "resize", "height": 48}, {"op": "median", "ksize": 3}, {"op": "equalize"}],
+    "otsu": [{"op": "resize", "height": 48}, {"op": "median", "ksize": 3}, {"op": "otsu"}],
+    "clahe": [{"op": "resize", "height": 48}, {"op": "clahe"}, {"op": "otsu"}],
+    "adaptive": [{"op": "resize", "height": 48}, {"op": "bilateral"},
+                 {"op": "adaptive"}, {"op": "morph", "operation": "open"}],
+}
+DEFAULT_PIPELINE = "default"
+RESIZE_HEIGHT = 48        # resize stage without a height
+
+
+def _resize(img, height=RESIZE_HEIGHT):
+    """Scale so the ROI is `height` px tall (Tesseract likes ~30 px glyphs)"""
+    h, w = img.shape[:2]
+    if h == height or h == 0:
+        return img
+    scale = height / h
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(img, (max(1, round(w * scale)), height), interpolation=interpolation)
+
+
+# Every stage below takes an optional `dst` array (same shape, uint8) to
+# write into instead of allocating its result.
+
+def _median(img, ksize=3, dst=None):
+    return cv2.medianBlur(img, ksize, dst=dst)
+
+
+def _gaussian(img, ksize=3, dst=None):
+    return cv2.GaussianBlur(img, (ksize, ksize), 0, dst=dst)
+
+
+def _bilateral(img, d=5, sigma_color=50, sigma_space=50, dst=None):
+    return cv2.bilateralFilter(img, d, sigma_color, sigma_space, dst=dst)
+
+
+def _denoise(img, h=10, dst=None):
+    return cv2.fastNlMeansDenoising(img, dst=dst, h=h)
+
+
+def _equalize(img, dst=None):
+    return cv2.equalizeHist(img, dst=dst)
+
+
+def _clahe(img, clip_limit=2.0, tile=8, dst=None):
+    return cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile, tile)).apply(img, dst=dst)
+
+
+def _otsu(img, invert=False, dst=None):
+    mode = cv2.THRESH_BINARY_INV if invert else cv2.THRESH_BINARY
+    return cv2.threshold(img, 0, 255, mode + cv2.THRESH_OTSU, dst=dst)[1]
+
+
+def _adaptive(img, block_size=31, c=10, invert=False, dst=None):
+    mode = cv2.THRESH_BINARY_INV if invert else cv2.THRESH_BINARY
+    return cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, mode, block_size, c, dst=dst)
+
+
+_MORPH_OPS = {
+    "open": cv2.MORPH_OPEN,
+    "close": cv2.MORPH_CLOSE,
+    "erode": cv2.MORPH_ERODE,
+    "dilate": cv2.MORPH_DILATE,
+}
+
+
+def _morph(img, operation="open", ksize=2, dst=None):
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (ksize, ksize))
+    return cv2.morphologyEx(img, _MORPH_OPS[operation], kernel, dst=dst)
+
+
+STAGES = {
+    "resize": _resize,
+    "median": _median,
+    "gaussian": _gaussian,
+    "bilateral": _bilateral,
+    "denoise": _denoise,
+    "equalize": _equalize,
+    "clahe": _clahe,
+    "otsu": _otsu,
+    "adaptive": _adaptive,
+    "morph": _morph,
+}
+
+# Stages computed from statistics of the whole image: batched preprocessing
+# (camera_module.RoiPreprocessor) runs them on each ROI separately. All the
+# other stages only look at a small neighbourhood of each pixel.
+GLOBAL_STAGES = {"equalize", "clahe", "otsu"}
+# Neighbourhood stages whose OpenCV implementation repeats the edge pixels
+# past the image border; the others reflect them
+REPLICATE_BORDER_STAGES = {"median", "morph", "adaptive"}
+
+
+def resolve_pipeline(spec=None):
+    """
+    Turn a pipeline spec (None, a PIPELINES name, or a list of stages) into
+    a validated list of stages. Raises ValueError for unknown names/ops.
+    """
+    if spec is None:
+        spec = DEFAULT_PIPELINE
+    if isinstance(spec, str):
+        if spec not in PIPELINES:
+            raise ValueError(f"Unknown preprocessing pipeline: {spec}")
+        spec = PIPELINES[spec]
+    for stage in spec:
+        if stage.get("op") not in STAGES:
+            raise ValueError(f"Unknown preprocessing stage: {stage.get('op')}")
+    return spec
+
+
+def to_gray(roi):
+    return cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+
+
+def apply_pipeline(roi, pipeline=None, timings=None):
+    """
+    Run a ROI (BGR or grayscale) through a pipeline, returns the grayscale
+    result. If `timings` is a list, (op, seconds) is appended per stage.
+    """
+    stages = resolve_pipeline(pipeline)
+    start = time.perf_counter()
+    img = to_gray(roi)
+    if timings is not None:
+        timings.append(("gray", time.perf_counter() - start))
+
+    for stage in stages:
+        params = {k: v for k, v in stage.items() if k != "op"}
+        start = time.perf_counter()
+        img = STAGES[stage["op"]](img, **params)
+        if timings is not None:
+            timings.append((stage["op"], time.perf_counter() - start))
+    return img
@@ -0,0 +1,223 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+REFERENCES_FILE = "references.json"    # legacy / exchange format
+REFERENCES_DB = "references.db"
+
+SCHEMA_VERSION = 1
+
+# Frame size the ROIs of references saved without a 'resolution' were drawn on
+LEGACY_RESOLUTION = (640, 480)
+
+
+def set_roi(ref, roi, resolution):
+    """
+    Store a pixel ROI (x, y, w, h) drawn on a frame of `resolution`
+    (width, height) as fractions of the frame, so it stays on the same
+    spot whatever resolution the camera runs at.
+    """
+    width, height = resolution
+    x, y, w, h = roi
+    ref['roi'] = [round(x / width, 6), round(y / height, 6), round(w / width, 6), round(h / height, 6)]
+    ref['resolution'] = [int(width), int(height)]
+
+
+def upgrade_roi(ref, resolution=LEGACY_RESOLUTION):
+    """
+    Normalize the raw pixel ROI of a reference saved before ROIs carried
+    their resolution, taking it as drawn on a frame of `resolution`.
+    Returns the reference.
+    """
+    if ref.get('roi') and 'resolution' not in ref:
+        set_roi(ref, ref['roi'], resolution)
+    return ref
+
+
+def roi_pixels(ref, frame_size=None):
+    """
+    Pixel (x, y, w, h) of a reference ROI in a frame of frame_size
+    (width, height), default the resolution it was drawn at. References
+    saved before ROIs were normalized (no 'resolution') are raw pixels.
+    Returns None if the reference has no ROI.
+    """
+    roi = ref.get('roi')
+    if not roi:
+        return None
+    if 'resolution' not in ref:
+        return tuple(int(v) for v in roi)
+    width, height = frame_size or ref['resolution']
+    x, y, w, h = roi
+    return (int(round(x * width)), int(round(y * height)),
+            max(1, int(round(w * width))), max(1, int(round(h * height))))
+
+
+def _same_aspect(size, other, tolerance=0.01):
+    return abs(size[0] * other[1] / (size[1] * other[0]) - 1.0) <= tolerance
+
+
+def aspect_mismatch(ref, frame_size):
+    """
+    True if the reference ROI was drawn on a frame of another aspect ratio
+    than frame_size (width, height): roi_pixels() then stretches it, e.g.
+    a 4:3 ROI on a 16:9 frame.
+    """
+    return bool(ref.get('roi')) and 'resolution' in ref and \
+        not _same_aspect(ref['resolution'], frame_size)
+
+
+def capture_resolution(references, default):
+    """
+    Camera mode to request for `references`: `default`, unless most ROIs
+    were drawn at another aspect ratio (legacy 640x480 references against a
+    16:9 default), then the resolution they were drawn at, so they are not
+    stretched.
+    """
+    drawn = Counter(tuple(ref['resolution']) for ref in references
+                    if ref.get('roi') and 'resolution' in ref)
+    if not drawn:
+        return default
+    resolution = drawn.most_common(1)[0][0]
+    return default if _same_aspect(resolution, default) else resolution
+
+
+def roi_bounds(references, frame_size, margin=16):
+    """
+    Smallest (x, y, w, h) covering every reference ROI plus `margin`
+    pixels, clipped to the frame. None if no reference has a ROI.
+    """
+    boxes = [roi_pixels(ref, frame_size) for ref in references if ref.get('roi')]
+    if not boxes:
+        return None
+    width, height = frame_size
+    x0 = max(0, min(x for x, _, _, _ in boxes) - margin)
+    y0 = max(0, min(y for _, y, _, _ in boxes) - margin)
+    x1 = min(width, max(x + w for x, _, w, _ in boxes) + margin)
+    y1 = min(height, max(y + h for _, y, _, h in boxes) + margin)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def load_references(path=REFERENCES_DB):
+    """
+    List of reference dicts from a JSON file or a reference database.
+    Returns [] if a JSON file is missing or unreadable.
+    """
+    if path.endswith(".json"):
+        return load_references_json(path)
+    store = ReferenceStore(path)
+    try:
+        return store.all()
+    finally:
+        store.close()
+
+
+def load_references_json(path=REFERENCES_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return [upgrade_roi(ref) for ref in json.load(f)]
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load {path}: {e}")
+            return []
+    return []
+
+
+class ReferenceStore:
+    """
+    SQLite-backed reference catalogue.
+
+    name and expected_text are columns (name is indexed); everything else (roi,
+    preprocess, ...) lives in a JSON `data` column so new fields don't need
+    a migration. Every add/update/delete is its own transaction, so a save
+    costs the same with ten references or ten thousand, and a crash leaves
+    the last committed state. On first use the legacy references.json is
+    imported once.
+    """
+
+    def __init__(self, path=REFERENCES_DB, json_path=REFERENCES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        if json_path and not self._meta("migrated_from_json"):
+            self.migrate_from_json(json_path)
+
+    def _create_schema(self):
+        with self._lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS refs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    expected_text TEXT NOT NULL,
+                    data TEXT NOT NULL DEFAULT '{}'
+                );
+                CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+            """)
+            self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)",
+                              (str(SCHEMA_VERSION),))
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _meta(self, key):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def migrate_from_json(self, json_path):
+        """Import a references.json once (skipped if the store already has data)"""
+        references = load_references_json(json_path) if os.path.exists(json_path) else []
+        with self._lock, self.conn:
+            empty = self.conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0] == 0
+            if empty:
+                self.conn.executemany(
+                    "INSERT INTO refs (name, expected_text, data) VALUES (?, ?, ?)",
+                    [self._row_values(ref) for ref in references])
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_from_json', ?)",
+                              (json_path,))
+        if empty and references:
+            print(f"Imported {len(references)} references from {json_path} into {self.path}")
+
+    @staticmethod
+    def _row_values(ref):
+        data = {k: v for k, v in ref.items() if k not in ("id", "name", "expected_text")}
+        return ref["name"], ref["expected_text"], json.dumps(data)
+
+    @staticmethod
+    def _to_dict(row):
+        ref = {'id': row["id"], 'name': row["name"], 'expected_text': row["expected_text"]}
+        ref.update(json.loads(row["data"]))
+        return upgrade_roi(ref)     # rows imported before ROIs were normalized
+
+    def all(self):
+        return [self._to_dict(row) for row in self._query("SELECT * FROM refs ORDER BY id")]
+
+    def add(self, ref):
+        """Insert a reference dict, sets and returns its new id"""
+        with self._lock, self.conn:
+            cur = self.conn.execute("INSERT INTO refs (name, expected_text, data) VALUES (?, ?, ?)",
+                                    self._row_values(ref))
+        ref['id'] = cur.lastrowid
+        return ref['id']
+
+    def update(self, ref):
+        """Save changes to a reference dict that has an id"""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE refs SET name = ?, expected_text = ?, data = ? WHERE id = ?",
+                              (*self._row_values(ref), ref['id']))
+
+    def delete(self, ref_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM refs WHERE id = ?", (ref_id,))
+
+    def close(self):
+        self.conn.close()
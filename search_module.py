@@ -0,0 +1,177 @@
+import bisect
+import itertools
+from collections import Counter, defaultdict
+
+MAX_CANDIDATES = 500     # per index lookup, before ranking
+# Trigrams in more keys than this ("  p", "-00", ...) cost the most to
+# count and say the least about the match: lookup() skips them
+MAX_POSTING = 2000
+
+
+def normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+def trigrams(text):
+    """Set of 3-character grams, padded so short words still get some"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to item ids. lookup() returns the ids that
+    share the most trigrams with the query, with the share as a score.
+    gram_fn turns a text into its set of grams (default trigrams()).
+    Removed ids stay in the postings and are skipped until they dominate,
+    then the postings are compacted.
+    """
+
+    def __init__(self, gram_fn=trigrams, max_posting=MAX_POSTING):
+        self.gram_fn = gram_fn
+        self.max_posting = max_posting
+        self.postings = defaultdict(list)
+        self.sizes = {}          # item id -> number of grams of its key
+        self._dead = 0
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def add(self, item_id, text):
+        grams = self.gram_fn(text)
+        for gram in grams:
+            self.postings[gram].append(item_id)
+        self.sizes[item_id] = len(grams)
+
+    def remove(self, item_id):
+        if self.sizes.pop(item_id, None) is None:
+            return
+        self._dead += 1
+        if self._dead > len(self.sizes) + 1000:
+            self.compact()
+
+    def compact(self):
+        """Drop removed ids from the postings"""
+        for gram in list(self.postings):
+            posting = [item_id for item_id in self.postings[gram] if item_id in self.sizes]
+            if posting:
+                self.postings[gram] = posting
+            else:
+                del self.postings[gram]
+        self._dead = 0
+
+    def lookup(self, text, limit=MAX_CANDIDATES):
+        """[(item_id, dice score 0-1)], best first"""
+        grams = self.gram_fn(text)
+        postings = sorted((self.postings[g] for g in grams if g in self.postings), key=len)
+        if not postings:
+            return []
+        # Rarest first; when every gram is common, only the first ids of
+        # the rarest one are looked at
+        rare = [p for p in postings if len(p) <= self.max_posting] or [postings[0][:self.max_posting]]
+        counts = Counter(itertools.chain.from_iterable(rare))
+        # Dice only reorders ids with about the same number of shared grams:
+        # score the ones sharing the most
+        sizes = self.sizes
+        best = sorted(counts, key=counts.__getitem__, reverse=True)[:limit * 4]
+        scored = [(2.0 * counts[item_id] / (len(grams) + sizes[item_id]), item_id)
+                  for item_id in best if item_id in sizes]
+        scored.sort(reverse=True)
+        return [(item_id, score) for score, item_id in scored[:limit]]
+
+
+class ReferenceIndex:
+    """
+    Type-ahead search over reference names and expected texts.
+
+    Prefix matches come from sorted key lists (bisect), fuzzy/substring
+    matches from a trigram index. Adds are incremental; removals are
+    tombstoned until rebuild().
+    """
+
+    def __init__(self, references=()):
+        self.rebuild(references)
+
+    def rebuild(self, references=()):
+        self.refs = {}               # item id -> reference dict
+        self._next_id = 0
+        self._by_ref = {}            # id(reference dict) -> item id
+        self._name_keys = []         # sorted [(normalized name, item id)]
+        self._text_keys = []
+        self.trigrams = TrigramIndex()
+        # Appended and sorted once: insort per reference is O(n^2)
+        for ref in references:
+            item_id, name, text = self._register(ref)
+            self._name_keys.append((name, item_id))
+            self._text_keys.append((text, item_id))
+        self._name_keys.sort()
+        self._text_keys.sort()
+
+    def __len__(self):
+        return len(self.refs)
+
+    def _register(self, ref):
+        item_id = self._next_id
+        self._next_id += 1
+        self.refs[item_id] = ref
+        self._by_ref[id(ref)] = item_id
+        name, text = normalize(ref['name']), normalize(ref['expected_text'])
+        self.trigrams.add(item_id, f"{name} {text}")
+        return item_id, name, text
+
+    def add(self, ref):
+        item_id, name, text = self._register(ref)
+        bisect.insort(self._name_keys, (name, item_id))
+        bisect.insort(self._text_keys, (text, item_id))
+        return item_id
+
+    def remove(self, ref):
+        item_id = self._by_ref.pop(id(ref), None)
+        if item_id is not None:
+            del self.refs[item_id]
+            self.trigrams.remove(item_id)
+        # Dead ids stay in the key lists and are skipped; compact once they
+        # dominate
+        if len(self._name_keys) > 2 * len(self.refs) + 1000:
+            self.rebuild(list(self.refs.values()))
+
+    def update(self, ref):
+        self.remove(ref)
+        self.add(ref)
+
+    def _prefix(self, keys, query, limit):
+        found = []
+        i = bisect.bisect_left(keys, (query,))
+        while i < len(keys) and len(found) < limit and keys[i][0].startswith(query):
+            if keys[i][1] in self.refs:
+                found.append(keys[i][1])
+            i += 1
+        return found
+
+    def search(self, query, limit=20):
+        """Best matching reference dicts for a (partial) query, best first"""
+        query = normalize(query)
+        if not query:
+            return list(itertools.islice(self.refs.values(), limit))
+
+        scores = defaultdict(float)
+        for item_id in self._prefix(self._name_keys, query, MAX_CANDIDATES):
+            scores[item_id] = max(scores[item_id], 80.0)
+        for item_id in self._prefix(self._text_keys, query, MAX_CANDIDATES):
+            scores[item_id] = max(scores[item_id], 60.0)
+        if len(query) >= 2:
+            for item_id, similarity in self.trigrams.lookup(query, MAX_CANDIDATES):
+                ref = self.refs[item_id]
+                score = 40.0 * similarity
+                if query in normalize(ref['name']):
+                    score += 20.0
+                elif query in normalize(ref['expected_text']):
+                    score += 10.0
+                scores[item_id] = max(scores[item_id], score)
+
+        for item_id in scores:
+            if normalize(self.refs[item_id]['name']) == query:
+                scores[item_id] = 100.0
+
+        ranked = sorted(scores, key=lambda i: (-scores[i], len(self.refs[i]['name']), self.refs[i]['name']))
+        return [self.refs[i] for i in ranked[:limit]]
@@ -0,0 +1,318 @@
+import os
+import re
+import time
+
+import cv2
+import numpy as np
+
+from reference_module import roi_pixels
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+# Requested camera mode. MJPG keeps 1080p within USB 2 bandwidth (raw YUYV
+# tops out around 5 fps at that size); drivers fall back to the nearest
+# mode they support.
+CAMERA_RESOLUTION = (1920, 1080)
+CAMERA_FPS = 30
+CAMERA_FOURCC = "MJPG"
+
+
+class _PacedSource:
+    """
+    Base for file-backed sources. Mirrors the cv2.VideoCapture calls used
+    by CameraApp (isOpened / read / grab / retrieve / release). read() and
+    grab() sleep to replay at `fps`; fps=0 returns frames as fast as they
+    are asked for.
+    """
+    is_live = False
+
+    def __init__(self, fps=0.0, loop=False):
+        self.fps = fps
+        self.loop = loop
+        self._next_time = None
+        self._grabbed = (False, None)
+
+    def grab(self):
+        """Advance one frame; sources that can skip decoding override this"""
+        self._grabbed = self.read()
+        return self._grabbed[0]
+
+    def retrieve(self):
+        grabbed, self._grabbed = self._grabbed, (False, None)
+        return grabbed
+
+    def _pace(self):
+        if not self.fps:
+            return
+        now = time.monotonic()
+        if self._next_time is not None and self._next_time > now:
+            time.sleep(self._next_time - now)
+            now = self._next_time
+        self._next_time = now + 1.0 / self.fps
+
+    def __iter__(self):
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+
+class VideoFileSource(_PacedSource):
+    """Recorded video, replayed at its own frame rate unless fps is given"""
+
+    def __init__(self, path, fps=None, loop=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if fps is None:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        super().__init__(fps, loop)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def grab(self):
+        self._pace()
+        ret = self.cap.grab()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret = self.cap.grab()
+        return ret
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageFolderSource(_PacedSource):
+    """Every image of a directory in name order, one per frame"""
+
+    def __init__(self, path, fps=0.0, loop=False):
+        super().__init__(fps, loop)
+        self.path = path
+        self.files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.index = 0
+        self._grabbed_path = None
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def read(self):
+        while True:
+            if not self.grab():
+                return False, None
+            ret, frame = self.retrieve()
+            if ret:
+                return ret, frame
+
+    def grab(self):
+        """Pick the next file; it is only read and decoded by retrieve()"""
+        if self.index >= len(self.files):
+            if not self.loop or not self.files:
+                return False
+            self.index = 0
+        self._grabbed_path = self.files[self.index]
+        self.index += 1
+        self._pace()
+        return True
+
+    def retrieve(self):
+        if self._grabbed_path is None:
+            return False, None
+        frame = cv2.imread(self._grabbed_path)
+        if frame is None:
+            print(f"Warning: Could not read image {self._grabbed_path}")
+        return frame is not None, frame
+
+    def release(self):
+        self.files = []
+
+
+def render_text(text, width, height):
+    """Black text on a white background, roughly filling the box"""
+    img = np.full((height, width, 3), 255, np.uint8)
+    (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
+    scale = min(0.8 * width / max(tw, 1), 0.6 * height / max(th, 1))
+    (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+    org = ((width - tw) // 2, (height + th) // 2)
+    cv2.putText(img, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), 2, cv2.LINE_AA)
+    return img
+
+
+class SyntheticTextSource(_PacedSource):
+    """
+    Generated frames with every reference's expected_text rendered into
+    its ROI, plus optional sensor noise and a few pixels of placement
+    jitter. Gives repeatable input (and known answers) without a camera.
+    """
+
+    def __init__(self, references, size=(640, 480), frames=100, fps=0.0,
+                 noise=8.0, jitter=2, seed=0, loop=False):
+        super().__init__(fps, loop)
+        self.references = [r for r in references if r.get("roi")]
+        self.size = size
+        self.frames = frames
+        self.noise = noise
+        self.jitter = jitter
+        self.rng = np.random.default_rng(seed)
+        self.index = 0
+        self._background = self._render_background()
+
+    def _render_background(self):
+        width, height = self.size
+        frame = np.full((height, width, 3), 90, np.uint8)
+        for ref in self.references:
+            x, y, w, h = roi_pixels(ref, self.size)
+            patch = render_text(ref["expected_text"], w, h)
+            frame[y:y+h, x:x+w] = patch[:max(0, height - y), :max(0, width - x)]
+        return frame
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def grab(self):
+        if self.frames and self.index >= self.frames:
+            if not self.loop:
+                return False
+            self.index = 0
+        self.index += 1
+        self._pace()
+        return True
+
+    def retrieve(self):
+        """Render the noisy frame (the expensive part, skipped for grab-only frames)"""
+        frame = self._background
+        if self.jitter:
+            dx, dy = self.rng.integers(-self.jitter, self.jitter + 1, 2)
+            frame = np.roll(frame, (int(dy), int(dx)), axis=(0, 1))
+        if self.noise:
+            noise = self.rng.normal(0, self.noise, frame.shape)
+            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+        else:
+            frame = frame.copy()
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def is_live(source):
+    """Plain cv2.VideoCapture objects are cameras; file sources say otherwise"""
+    return getattr(source, "is_live", True)
+
+
+def configure_capture(cap, resolution=CAMERA_RESOLUTION, fps=CAMERA_FPS, fourcc=CAMERA_FOURCC):
+    """
+    Ask a camera for a capture mode and return the (width, height, fps)
+    it actually delivers. FOURCC goes first: V4L2 only offers the larger
+    sizes once the compressed format is selected.
+    """
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if resolution:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    actual = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+              cap.get(cv2.CAP_PROP_FPS))
+    if resolution and tuple(actual[:2]) != tuple(resolution):
+        print(f"Warning: camera runs at {actual[0]}x{actual[1]} instead of {resolution[0]}x{resolution[1]}")
+    return actual
+
+
+def gstreamer_available():
+    """True if this OpenCV build can open GStreamer pipelines"""
+    return re.search(r"GStreamer:\s*YES", cv2.getBuildInformation()) is not None
+
+
+def gstreamer_pipeline(device="/dev/video0", resolution=CAMERA_RESOLUTION, fps=CAMERA_FPS,
+                       fourcc=CAMERA_FOURCC, crop=None):
+    """
+    V4L2 capture pipeline ending in a BGR appsink. With crop=(x, y, w, h)
+    (sensor pixels) videocrop cuts the frame right after decoding, so
+    colour conversion and the copy into OpenCV only touch the crop.
+    appsink keeps just the newest buffer.
+    """
+    width, height = resolution
+    caps = f"width={width},height={height},framerate={int(fps)}/1"
+    if fourcc == "MJPG":
+        pipeline = f"v4l2src device={device} ! image/jpeg,{caps} ! jpegdec"
+    else:
+        pipeline = f"v4l2src device={device} ! video/x-raw,{caps}"
+    if crop:
+        x, y, w, h = crop
+        pipeline += f" ! videocrop left={x} top={y} right={width - x - w} bottom={height - y - h}"
+    return pipeline + " ! videoconvert ! video/x-raw,format=BGR ! appsink drop=true max-buffers=1 sync=false"
+
+
+class GStreamerSource:
+    """
+    Camera read through a GStreamer pipeline (see gstreamer_pipeline()).
+    Frames may be a crop of the sensor: `frame_offset` is the crop origin
+    and `full_size` the sensor resolution, which CameraApp uses to place
+    ROIs.
+    """
+    is_live = True
+
+    def __init__(self, device="/dev/video0", resolution=CAMERA_RESOLUTION, fps=CAMERA_FPS,
+                 fourcc=CAMERA_FOURCC, crop=None):
+        self.full_size = tuple(resolution)
+        self.frame_offset = (crop[0], crop[1]) if crop else (0, 0)
+        self.pipeline = gstreamer_pipeline(device, resolution, fps, fourcc, crop)
+        self.cap = cv2.VideoCapture(self.pipeline, cv2.CAP_GSTREAMER)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def grab(self):
+        return self.cap.grab()
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def release(self):
+        self.cap.release()
+
+
+def open_source(spec, fps=None, loop=False, resolution=None, fourcc=None, crop=None):
+    """
+    Open a frame source from a command-line style spec:
+    a camera index ("0"), a GStreamer camera ("gst:/dev/video0"), a video
+    file, or a directory of images.
+    For cameras, fps / resolution / fourcc select the capture mode
+    (default CAMERA_*); for files fps is the replay speed. crop=(x, y, w, h)
+    is applied upstream by GStreamer cameras and ignored otherwise.
+    """
+    if str(spec).startswith("gst:"):
+        if not gstreamer_available():
+            print("Warning: this OpenCV build has no GStreamer support")
+        return GStreamerSource(str(spec)[4:] or "/dev/video0", resolution or CAMERA_RESOLUTION,
+                               fps or CAMERA_FPS, fourcc or CAMERA_FOURCC, crop)
+    if isinstance(spec, int) or str(spec).isdigit():
+        cap = cv2.VideoCapture(int(spec))
+        if cap.isOpened():
+            configure_capture(cap, resolution or CAMERA_RESOLUTION, fps or CAMERA_FPS,
+                              fourcc or CAMERA_FOURCC)
+        return cap
+    if os.path.isdir(spec):
+        return ImageFolderSource(spec, fps or 0.0, loop)
+    return VideoFileSource(spec, fps, loop)
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import locate_module as loc  # noqa: E402
+import reference_module as refs  # noqa: E402
+import source_module as src  # noqa: E402
+
+
+def inside(box, outer):
+    x, y, w, h = box
+    ox, oy, ow, oh = outer
+    return ox <= x + w // 2 <= ox + ow and oy <= y + h // 2 <= oy + oh
+
+
+def test_text_on_a_label_on_a_part():
+    frame = np.full((1080, 1920, 3), 120, np.uint8)
+    cv2.circle(frame, (300, 300), 120, (80, 80, 80), -1)
+    cv2.rectangle(frame, (700, 400), (1260, 600), (245, 245, 245), -1)
+    cv2.rectangle(frame, (700, 400), (1260, 600), (20, 20, 20), 3)
+    cv2.putText(frame, "LOT 12345", (740, 480), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (10, 10, 10), 3)
+    cv2.putText(frame, "SN 998877", (740, 560), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (10, 10, 10), 3)
+
+    regions = loc.detect_text_regions(frame)
+    assert len(regions) == 2
+    for x, y, w, h in regions:
+        assert 700 < x and x + w < 1260 and 400 < y and y + h < 600    # the lines, not the label
+        assert w > 200                                                  # whole line, not one word
+
+
+def test_synthetic_source_frame():
+    references = []
+    for text, roi in (("LOT 12345", (100, 100, 400, 80)), ("SN 998877", (700, 300, 400, 80)),
+                      ("2024-06", (200, 500, 300, 70))):
+        ref = {'name': text, 'expected_text': text}
+        refs.set_roi(ref, roi, (1280, 720))
+        references.append(ref)
+    _, frame = src.SyntheticTextSource(references, size=(1920, 1080), frames=1).read()
+
+    regions = loc.detect_text_regions(frame)
+    for ref in references:
+        roi = refs.roi_pixels(ref, (1920, 1080))
+        assert sum(inside(box, roi) for box in regions) == 1
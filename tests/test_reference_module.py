@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import reference_module as refs  # noqa: E402
+import source_module as src  # noqa: E402
+
+
+def legacy(name, roi):
+    return refs.upgrade_roi({"name": name, "expected_text": "X", "roi": list(roi)})
+
+
+def test_legacy_references_keep_their_camera_mode():
+    references = [legacy("A", (10, 20, 100, 40)), legacy("B", (300, 200, 80, 30))]
+    assert refs.capture_resolution(references, src.CAMERA_RESOLUTION) == refs.LEGACY_RESOLUTION
+    assert refs.roi_pixels(references[0], refs.LEGACY_RESOLUTION) == (10, 20, 100, 40)
+    assert refs.aspect_mismatch(references[0], src.CAMERA_RESOLUTION)
+
+
+def test_same_aspect_references_use_the_default_mode():
+    ref = {"name": "A", "expected_text": "X"}
+    refs.set_roi(ref, (100, 100, 200, 50), (1280, 720))
+    assert refs.capture_resolution([ref], src.CAMERA_RESOLUTION) == src.CAMERA_RESOLUTION
+    assert not refs.aspect_mismatch(ref, src.CAMERA_RESOLUTION)
+    assert refs.capture_resolution([], src.CAMERA_RESOLUTION) == src.CAMERA_RESOLUTION
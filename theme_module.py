@@ -1,10 +1,56 @@
+import json
+import os
+
 import ttkbootstrap as ttk
 
+# Theme list and resized logo are kept here between launches
+CACHE_DIR = ".cache"
+
+
 def get_available_themes():
-    """Returns a list of available ttkbootstrap themes."""
-    # Create a temporary style object to get theme names if needed, 
-    # but ttkbootstrap has a built-in list.
-    return ttk.Style().theme_names()
+    """
+    Returns a list of available ttkbootstrap themes. Read from the cache
+    when it was written by the same ttkbootstrap version, otherwise asked
+    from the style and cached.
+    """
+    path = os.path.join(CACHE_DIR, "themes.json")
+    version = getattr(ttk, "__version__", "")
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        if cached.get("version") == version:
+            return cached["themes"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    themes = list(ttk.Style().theme_names())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"version": version, "themes": themes}, f)
+    except OSError as e:
+        print(f"Warning: could not cache the theme list: {e}")
+    return themes
+
+
+def cached_logo(path, height):
+    """
+    Path of `path` scaled to `height` pixels (LANCZOS, PNG), resized only
+    when the cached copy is missing or older than the original.
+    """
+    name = f"{os.path.splitext(os.path.basename(path))[0]}-{height}.png"
+    cached = os.path.join(CACHE_DIR, name)
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path):
+        return cached
+
+    from PIL import Image    # only needed when the cache is stale
+    with Image.open(path) as img:
+        width = int(height * img.width / img.height)
+        resized = img.resize((width, height), Image.Resampling.LANCZOS)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    resized.save(cached)
+    return cached
+
 
 def set_theme(root, theme_name):
     """